@@ -0,0 +1,138 @@
+"""Admission control for whitelist submissions.
+
+Every applicant has a small token bucket so one account can't keep re-applying,
+and every guild has a larger bucket shared by all of its applicants. When the
+guild bucket runs dry, submissions wait in a bounded FIFO and are posted to the
+review channel as tokens come back, so a raid reaches reviewers as a steady
+trickle; once the queue is full, new submissions are turned away.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+ADMITTED, QUEUED, THROTTLED, FULL = "admitted", "queued", "throttled", "full"
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: int, now: float = None):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def retry_after(self, now: float = None) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(time.monotonic() if now is None else now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float = None) -> bool:
+        if self.retry_after(now): return False
+        self.tokens -= 1
+        return True
+
+
+@dataclass
+class Decision:
+    result: str              # ADMITTED, QUEUED, THROTTLED or FULL
+    retry_after: float = 0.0  # THROTTLED / FULL: seconds before trying again is worthwhile
+    position: int = 0        # QUEUED: place in the guild's overflow queue (1 = next)
+    wait: float = 0.0        # QUEUED: rough seconds until it is posted
+
+
+class _Lane:
+    __slots__ = ("bucket", "queue", "task")
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.queue = deque()
+        self.task = None
+
+
+class SubmissionGate:
+    """Decides whether a submission is posted now, held in its guild's queue, or refused.
+
+    `release` is awaited as `release(item)` for every held item, in order, at the
+    guild rate. ADMITTED submissions are the caller's to post right away.
+    """
+
+    def __init__(self, release, user_rate: float, user_burst: int, guild_rate: float, guild_burst: int,
+                 queue_size: int = 100, max_users: int = 10000):
+        self.release = release
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.guild_rate = guild_rate
+        self.guild_burst = guild_burst
+        self.queue_size = queue_size
+        self.max_users = max_users
+        self._users = OrderedDict()  # (guild id, user id) -> TokenBucket, least recently used first
+        self._lanes = {}             # guild id -> _Lane
+
+    def __len__(self):
+        return sum(len(lane.queue) for lane in self._lanes.values())
+
+    def depth(self, guild_id: int) -> int:
+        lane = self._lanes.get(guild_id)
+        return len(lane.queue) if lane else 0
+
+    def _user_bucket(self, key, now: float) -> TokenBucket:
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = self._users[key] = TokenBucket(self.user_rate, self.user_burst, now)
+            # The oldest buckets have long since refilled, so forgetting them loses nothing
+            while len(self._users) > self.max_users: self._users.popitem(last=False)
+        self._users.move_to_end(key)
+        return bucket
+
+    def _lane(self, guild_id: int, now: float) -> _Lane:
+        lane = self._lanes.get(guild_id)
+        if lane is None: lane = self._lanes[guild_id] = _Lane(TokenBucket(self.guild_rate, self.guild_burst, now))
+        return lane
+
+    def admit(self, guild_id: int, user_id: int, item) -> Decision:
+        """Charges the user and guild buckets for one submission. `item` is queued if the decision is QUEUED."""
+        now = time.monotonic()
+        user = self._user_bucket((guild_id, user_id), now)
+        wait = user.retry_after(now)
+        if wait: return Decision(THROTTLED, retry_after=wait)
+
+        lane = self._lane(guild_id, now)
+        # Nobody jumps the queue: while it is non-empty every submission joins it
+        if not lane.queue and lane.bucket.take(now):
+            decision = Decision(ADMITTED)
+        elif len(lane.queue) < self.queue_size:
+            decision = self._hold(guild_id, lane, item, now)
+        else:
+            return Decision(FULL, retry_after=lane.bucket.retry_after(now) + len(lane.queue) / self.guild_rate)
+        user.take(now)
+        return decision
+
+    def requeue(self, guild_id: int, item) -> Decision:
+        """Holds an item without charging anyone (e.g. submissions still queued when the bot restarted)."""
+        now = time.monotonic()
+        return self._hold(guild_id, self._lane(guild_id, now), item, now)
+
+    def _hold(self, guild_id: int, lane: _Lane, item, now: float) -> Decision:
+        lane.queue.append(item)
+        if lane.task is None or lane.task.done(): lane.task = asyncio.create_task(self._drain(guild_id, lane))
+        position = len(lane.queue)
+        return Decision(QUEUED, position=position, wait=lane.bucket.retry_after(now) + (position - 1) / self.guild_rate)
+
+    async def _drain(self, guild_id: int, lane: _Lane):
+        while lane.queue:
+            wait = lane.bucket.retry_after()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            lane.bucket.take()
+            item = lane.queue.popleft()
+            try:
+                await self.release(item)
+            except Exception as e:
+                print(f"Submission Release Error ({guild_id}): {e}")
@@ -0,0 +1,218 @@
+"""SQLite-backed store of whitelist applications.
+
+Every application is written here when it is submitted and updated when a
+moderator decides on it, so the bot never has to parse review embeds or scan
+channel history to find out who applied for what.
+"""
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+PENDING, APPROVED, REJECTED = "pending", "approved", "rejected"
+QUEUED = "queued"  # approved, waiting for the server to come back
+OPEN_STATUSES = (PENDING, QUEUED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    mc_username TEXT NOT NULL,
+    mc_username_norm TEXT NOT NULL,
+    edition TEXT NOT NULL,
+    played_before TEXT,
+    notes TEXT,
+    status TEXT NOT NULL,
+    review_message_id INTEGER,
+    reviewer_id INTEGER,
+    reason TEXT,
+    final_username TEXT,
+    created_at REAL NOT NULL,
+    decided_at REAL,
+    guild_id INTEGER
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_app_user ON applications (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_app_mc_name ON applications (mc_username_norm, id);
+CREATE INDEX IF NOT EXISTS idx_app_status ON applications (status, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_app_message ON applications (review_message_id);
+CREATE INDEX IF NOT EXISTS idx_app_guild_user ON applications (guild_id, user_id, id);
+CREATE INDEX IF NOT EXISTS idx_app_guild_status ON applications (guild_id, status, id);
+"""
+
+
+@dataclass
+class Application:
+    id: int
+    user_id: int
+    username: str
+    mc_username: str
+    mc_username_norm: str
+    edition: str
+    played_before: Optional[str]
+    notes: Optional[str]
+    status: str
+    review_message_id: Optional[int]
+    reviewer_id: Optional[int]
+    reason: Optional[str]
+    final_username: Optional[str]
+    created_at: float
+    decided_at: Optional[float]
+    guild_id: Optional[int] = None  # None for applications recorded before per-guild configs
+
+
+def normalize_username(name: str) -> str:
+    return name.strip().lower()
+
+
+class ApplicationStore:
+    """Applications table plus an in-memory index of pending applications.
+
+    Duplicate and pending checks hit the in-memory dicts only; everything else
+    goes through SQLite indexes on user ID, Minecraft username and status.
+    Applications are scoped by guild: lookups only match the given `guild_id`.
+    """
+
+    def __init__(self, path: str = "applications.db"):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(applications)")}
+        if "guild_id" not in columns:
+            with self.db: self.db.execute("ALTER TABLE applications ADD COLUMN guild_id INTEGER")
+        self.db.executescript(INDEXES)
+        self._load_pending()
+
+    def _load_pending(self):
+        self._pending_by_user = {}  # (guild_id, user_id) -> application id
+        self._pending_by_name = {}  # (guild_id, normalized MC username) -> application id
+        self._pending_keys = {}     # application id -> (guild_id, user_id, normalized MC username)
+        for row in self.db.execute("SELECT id, guild_id, user_id, mc_username_norm FROM applications WHERE status IN (?, ?)", OPEN_STATUSES):
+            self._add_pending(row["id"], row["guild_id"], row["user_id"], row["mc_username_norm"])
+
+    def _one(self, query: str, params=()) -> Optional[Application]:
+        row = self.db.execute(query, params).fetchone()
+        return Application(**row) if row else None
+
+    # --- Writes ---
+
+    def create(self, user_id: int, username: str, mc_username: str, edition: str,
+               played_before: str = None, notes: str = None, review_message_id: int = None,
+               status: str = PENDING, created_at: float = None, guild_id: int = None) -> Application:
+        mc_username = mc_username.strip()
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO applications (user_id, username, mc_username, mc_username_norm, edition, played_before,"
+                " notes, status, review_message_id, created_at, guild_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, username, mc_username, normalize_username(mc_username), edition, played_before,
+                 notes, status, review_message_id, created_at or time.time(), guild_id))
+        if status == PENDING: self._add_pending(cur.lastrowid, guild_id, user_id, normalize_username(mc_username))
+        return self.get(cur.lastrowid)
+
+    def attach_message(self, app_id: int, message_id: int):
+        with self.db:
+            self.db.execute("UPDATE applications SET review_message_id = ? WHERE id = ?", (message_id, app_id))
+
+    def decide(self, app_id: int, status: str, reviewer_id: int, reason: str = None,
+               final_username: str = None) -> bool:
+        """Moves a pending or queued application to `status`. Returns False if it was already decided."""
+        with self.db:
+            cur = self.db.execute(
+                "UPDATE applications SET status = ?, reviewer_id = ?, reason = ?, final_username = ?, decided_at = ?"
+                " WHERE id = ? AND status IN (?, ?)",
+                (status, reviewer_id, reason, final_username, time.time(), app_id, *OPEN_STATUSES))
+        if not cur.rowcount: return False
+        self._drop_pending(app_id)
+        return True
+
+    def mark_queued(self, app_id: int, reviewer_id: int, final_username: str) -> bool:
+        """Marks a pending application as approved-but-queued. It stays in the pending index."""
+        with self.db:
+            cur = self.db.execute(
+                "UPDATE applications SET status = ?, reviewer_id = ?, final_username = ? WHERE id = ? AND status = ?",
+                (QUEUED, reviewer_id, final_username, app_id, PENDING))
+        return bool(cur.rowcount)
+
+    def reopen(self, app_id: int) -> bool:
+        """Puts a queued application back up for review (e.g. the server refused the queued command)."""
+        with self.db:
+            cur = self.db.execute("UPDATE applications SET status = ?, reviewer_id = NULL WHERE id = ? AND status = ?",
+                                  (PENDING, app_id, QUEUED))
+        return bool(cur.rowcount)
+
+    def assign_guild(self, guild_id: int) -> int:
+        """Moves applications recorded before per-guild configs into `guild_id`. Returns how many moved."""
+        with self.db:
+            cur = self.db.execute("UPDATE applications SET guild_id = ? WHERE guild_id IS NULL", (guild_id,))
+        if cur.rowcount: self._load_pending()
+        return cur.rowcount
+
+    def delete(self, app_id: int):
+        with self.db:
+            self.db.execute("DELETE FROM applications WHERE id = ?", (app_id,))
+        self._drop_pending(app_id)
+
+    def _add_pending(self, app_id: int, guild_id: int, user_id: int, name_norm: str):
+        self._pending_by_user[guild_id, user_id] = app_id
+        self._pending_by_name[guild_id, name_norm] = app_id
+        self._pending_keys[app_id] = (guild_id, user_id, name_norm)
+
+    def _drop_pending(self, app_id: int):
+        keys = self._pending_keys.pop(app_id, None)
+        if keys is None: return
+        guild_id, user_id, name_norm = keys
+        if self._pending_by_user.get((guild_id, user_id)) == app_id: del self._pending_by_user[guild_id, user_id]
+        if self._pending_by_name.get((guild_id, name_norm)) == app_id: del self._pending_by_name[guild_id, name_norm]
+
+    # --- Lookups ---
+
+    def get(self, app_id: int) -> Optional[Application]:
+        return self._one("SELECT * FROM applications WHERE id = ?", (app_id,))
+
+    def get_by_message(self, message_id: int) -> Optional[Application]:
+        return self._one("SELECT * FROM applications WHERE review_message_id = ?", (message_id,))
+
+    def pending_for_user(self, user_id: int, guild_id: int = None) -> Optional[Application]:
+        app_id = self._pending_by_user.get((guild_id, user_id))
+        return self.get(app_id) if app_id else None
+
+    def pending_for_username(self, mc_username: str, guild_id: int = None) -> Optional[Application]:
+        app_id = self._pending_by_name.get((guild_id, normalize_username(mc_username)))
+        return self.get(app_id) if app_id else None
+
+    def unposted(self):
+        """Pending applications that have no review message yet (held back by admission control), oldest first."""
+        rows = self.db.execute("SELECT * FROM applications WHERE status = ? AND review_message_id IS NULL ORDER BY id",
+                               (PENDING,)).fetchall()
+        return [Application(**row) for row in rows]
+
+    def latest_approved(self, user_id: int, guild_id: int = None) -> Optional[Application]:
+        return self._one("SELECT * FROM applications WHERE guild_id IS ? AND user_id = ? AND status = ? ORDER BY id DESC LIMIT 1",
+                         (guild_id, user_id, APPROVED))
+
+    def iter_approved(self, after_id: int = 0, limit: int = 100, guild_id: int = None):
+        """Returns up to `limit` approved applications with id > after_id, oldest first (keyset pagination)."""
+        rows = self.db.execute("SELECT * FROM applications WHERE guild_id IS ? AND status = ? AND id > ? ORDER BY id LIMIT ?",
+                               (guild_id, APPROVED, after_id, limit)).fetchall()
+        return [Application(**row) for row in rows]
+
+    def history(self, user_id: int = None, mc_username: str = None, status: str = None,
+                page: int = 0, per_page: int = 10, guild_id: int = None):
+        """Returns (applications, total) for one page of matches, newest first."""
+        clauses, params = ["guild_id IS ?"], [guild_id]
+        if user_id is not None: clauses.append("user_id = ?"); params.append(user_id)
+        if mc_username: clauses.append("mc_username_norm = ?"); params.append(normalize_username(mc_username))
+        if status: clauses.append("status = ?"); params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}"
+        total = self.db.execute(f"SELECT COUNT(*) FROM applications{where}", params).fetchone()[0]
+        rows = self.db.execute(f"SELECT * FROM applications{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                               (*params, per_page, page * per_page)).fetchall()
+        return [Application(**row) for row in rows], total
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,25 @@
+"""Crash-safe file writes shared by every module that persists state to disk."""
+import os
+import tempfile
+
+
+def atomic_write(path: str, data, fsync: bool = False):
+    """Replaces `path` with `data` (str or bytes) via a temp file in the same directory and a rename.
+
+    Readers see either the old or the new contents, never a partial file. The
+    temp file is removed if anything fails. `fsync` also flushes the data to
+    disk before the rename, for files that must survive a power loss.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except FileNotFoundError: pass
+        raise
@@ -0,0 +1,362 @@
+"""Load test for the bot's hot paths.
+
+Runs the real handlers from bot.py (WhitelistModal.on_submit, ReviewView.approve,
+RejectionModal.on_submit, poll_guild_status) against stubbed Discord objects
+and an in-process FakeRconServer, then reports per-operation latency
+percentiles, throughput and how long the event loop was blocked.
+
+    python benchmarks/bench_bot.py --apps 500 --concurrency 50 --rcon-latency 0.02
+
+Nothing here talks to Discord or a real Minecraft server. Data files are
+written to a temporary directory.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_rcon import FakeRconServer  # noqa: E402
+
+_ids = itertools.count(10**17)
+
+
+# --- Discord stubs ---
+
+class FakeAsset:
+    def __init__(self, url): self.url = url
+
+
+class FakeRole:
+    def __init__(self, role_id): self.id = role_id
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name=None, roles=None, rest=None):
+        self.id = user_id or next(_ids)
+        self.name = name or f"user{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.display_avatar = FakeAsset(f"https://cdn.example/avatars/{self.id}.png")
+        self.roles = list(roles or [])
+        self._rest = rest
+
+    async def add_roles(self, *roles, reason=None):
+        await self._rest.call("add_roles")
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self._rest.call("remove_roles")
+        self.roles = [r for r in self.roles if r not in roles]
+
+
+class FakeMessage:
+    def __init__(self, channel, embeds=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.embeds = list(embeds or [])
+        self.created_at = datetime.now(timezone.utc)
+
+    async def edit(self, embed=None, embeds=None, view=None, **kwargs):
+        await self.channel.rest.call("edit")
+        if embed is not None: self.embeds = [embed]
+        if embeds is not None: self.embeds = list(embeds)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, channel_id, rest, guild=None):
+        self.id = channel_id
+        self.rest = rest
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.messages = {}
+        self.sent = 0
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self.rest.call("send")
+        msg = FakeMessage(self, [embed] if embed is not None else embeds)
+        self.messages[msg.id] = msg
+        self.sent += 1
+        return msg
+
+    def get_partial_message(self, message_id):
+        return self.messages.setdefault(message_id, FakeMessage(self))
+
+    async def fetch_message(self, message_id):
+        await self.rest.call("fetch_message")
+        return self.messages[message_id]
+
+
+class FakeGuild:
+    def __init__(self, guild_id, rest):
+        self.id = guild_id
+        self.name = "Benchmark Guild"
+        self.rest = rest
+        self.roles = {}
+        self.members = {}
+
+    def get_role(self, role_id):
+        return self.roles.setdefault(role_id, FakeRole(role_id))
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id):
+        await self.rest.call("fetch_member")
+        return self.members[user_id]
+
+
+class FakeResponse:
+    def __init__(self, rest):
+        self.rest = rest
+        self._done = False
+        self.messages = []
+
+    def is_done(self): return self._done
+
+    async def defer(self, **kwargs):
+        await self.rest.call("defer")
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await self.rest.call("interaction_response")
+        self.messages.append(content)
+        self._done = True
+
+    async def send_modal(self, modal):
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, rest):
+        self.rest = rest
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.call("followup")
+        self.messages.append(content)
+
+
+class FakeInteraction:
+    def __init__(self, user, guild, channel, rest, message=None):
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.message = message
+        self.response = FakeResponse(rest)
+        self.followup = FakeFollowup(rest)
+
+
+class FakeRest:
+    """Simulated Discord REST latency, with a call counter per endpoint."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {}
+
+    async def call(self, endpoint):
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.latency: await asyncio.sleep(self.latency)
+
+
+# --- Measurement ---
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up; lateness beyond a few ms means something blocked it."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self): self._task = asyncio.create_task(self._run())
+
+    def stop(self): self._task.cancel()
+
+    @property
+    def blocked_time(self):
+        return sum(lag for lag in self.lags if lag > self.interval)
+
+
+def percentile(samples, pct):
+    if not samples: return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def timed_batch(name, coros, concurrency, results):
+    """Runs coroutines with bounded concurrency and records each one's latency."""
+    sem = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+
+    async def one(coro):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await coro
+            except Exception as e:
+                errors += 1
+                print(f"  {name} error: {e!r}")
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(c) for c in coros))
+    results.append((name, samples, time.perf_counter() - start, errors))
+
+
+def report(results, monitor, rest, fake):
+    print(f"\n{'operation':<14}{'n':>6}{'err':>5}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'ops/s':>9}")
+    for name, samples, wall, errors in results:
+        ms = [s * 1000 for s in samples]
+        print(f"{name:<14}{len(ms):>6}{errors:>5}{percentile(ms, 50):>9.1f}{percentile(ms, 90):>9.1f}"
+              f"{percentile(ms, 99):>9.1f}{max(ms, default=0):>9.1f}{len(ms) / wall if wall else 0:>9.1f}")
+    lags = [lag * 1000 for lag in monitor.lags]
+    print(f"\nevent loop lag: p50 {percentile(lags, 50):.2f} ms, p99 {percentile(lags, 99):.2f} ms, "
+          f"max {max(lags, default=0):.2f} ms, blocked {monitor.blocked_time * 1000:.1f} ms total")
+    print(f"discord calls: {dict(sorted(rest.calls.items()))}")
+    print(f"rcon: {fake.commands} commands over {fake.connections} connection(s), {fake.framing_errors} framing error(s)")
+
+
+# --- Scenario ---
+
+async def run(args):
+    fake = await FakeRconServer(latency=args.rcon_latency, jitter=args.rcon_jitter, failure_rate=args.rcon_failure_rate,
+                                players=[f"Player{i}" for i in range(args.players)]).start()
+    os.environ.update({"RCON_HOST": "127.0.0.1", "RCON_PORT": str(fake.port), "RCON_PASSWORD": fake.password,
+                       "WHITELIST_PATH": "", "BOT_TOKEN": "bench",
+                       "MEMBER_CACHE_MODE": "lean" if args.lean_members else "full",
+                       "SUBMIT_GUILD_BURST": str(args.apps)})  # measure the handlers, not the admission queue
+    workdir = tempfile.mkdtemp(prefix="wl_bench_")
+    os.chdir(workdir)
+    import bot as botmod  # imported late so it picks up the fake server and the temp working directory
+
+    rest = FakeRest(args.discord_latency)
+    guild = FakeGuild(next(_ids), rest)
+    channels = {}
+    for cid in (botmod.MC_WL_CHANNEL_ID, botmod.REVIEW_CHANNEL_ID, botmod.APPROVED_CHANNEL_ID,
+                botmod.REJECTED_CHANNEL_ID, botmod.LOG_CHANNEL_ID):
+        channels[cid] = FakeChannel(cid, rest, guild)
+    status_channel = FakeChannel(next(_ids), rest, guild)
+    channels[status_channel.id] = status_channel
+    botmod.bot.get_channel = channels.get
+    botmod.bot.get_guild = lambda gid: guild if gid == guild.id else None
+    botmod.bot.get_user = lambda uid: guild.members.get(uid)
+    botmod.guild_configs.update(guild.id, apply_channel_id=botmod.MC_WL_CHANNEL_ID, review_channel_id=botmod.REVIEW_CHANNEL_ID,
+                                approved_channel_id=botmod.APPROVED_CHANNEL_ID, rejected_channel_id=botmod.REJECTED_CHANNEL_ID,
+                                log_channel_id=botmod.LOG_CHANNEL_ID, whitelisted_role_id=botmod.MC_WHITELISTED_ROLE_ID,
+                                use_default_rcon=True)
+    if args.lean_members:
+        # No gateway member cache: every lookup has to go through MemberCache
+        guild.get_member = lambda uid: None
+        botmod.bot.get_user = lambda uid: None
+
+    async def fetch_user(uid):
+        await rest.call("fetch_user")
+        return guild.members.get(uid) or FakeUser(uid, rest=rest)
+    botmod.bot.fetch_user = fetch_user
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    botmod.log_dispatcher.start()
+    results = []
+    review = channels[botmod.REVIEW_CHANNEL_ID]
+    moderator = FakeUser(name="moderator", rest=rest)
+
+    # 1. Submissions
+    applicants = []
+    for i in range(args.apps):
+        user = FakeUser(name=f"applicant{i}", rest=rest)
+        user.guild = guild  # interaction.user is a Member in a guild
+        guild.members[user.id] = user
+        applicants.append(user)
+
+    async def submit(user, i):
+        modal = botmod.WhitelistModal()
+        modal.mc_username._value = f"Bench{i}"
+        modal.device._value = "Bedrock" if i % 5 == 0 else "Java"
+        modal.played_before._value = "Yes"
+        modal.notes._value = ""
+        await modal.on_submit(FakeInteraction(user, guild, channels[botmod.MC_WL_CHANNEL_ID], rest))
+    await timed_batch("submit", [submit(u, i) for i, u in enumerate(applicants)], args.concurrency, results)
+
+    # 2. Approve half, reject the other half (concurrently, like a busy review channel)
+    messages = list(review.messages.values())
+    half = len(messages) // 2
+
+    async def approve(msg):
+        await botmod.ReviewView.approve(botmod.ReviewView(), FakeInteraction(moderator, guild, review, rest, message=msg), None)
+
+    async def reject(msg):
+        original = FakeInteraction(moderator, guild, review, rest, message=msg)
+        modal = botmod.RejectionModal(original_interaction=original)
+        modal.reason._value = "Benchmark rejection reason"
+        await modal.on_submit(FakeInteraction(moderator, guild, review, rest))
+    await timed_batch("approve", [approve(m) for m in messages[:half]], args.concurrency, results)
+    await timed_batch("reject", [reject(m) for m in messages[half:]], args.concurrency, results)
+
+    # 3. Live status: alternate between changed and unchanged player lists
+    seed = await status_channel.send(content="status")
+    botmod.guild_configs.update(guild.id, status_channel_id=status_channel.id, status_message_id=seed.id)
+
+    async def status_tick(i):
+        if i % 2 == 0: fake.players.append(f"Joiner{i}")
+        botmod.group_polls.clear()  # don't let the next tick reuse this poll's result
+        await botmod.poll_guild_status(guild.id)
+    # Polls are sequential in production, so run them one at a time
+    await timed_batch("status", [status_tick(i) for i in range(args.status_polls)], 1, results)
+
+    await botmod.log_dispatcher.queue.join()
+    monitor.stop()
+    report(results, monitor, rest, fake)
+    await botmod.rcon.close()
+    await fake.stop()
+
+    status = 0
+    errors = sum(errors for _, _, _, errors in results)
+    if errors:
+        print(f"FAIL: {errors} handler error(s)")
+        status = 1
+    if fake.framing_errors:
+        print(f"FAIL: the RCON client sent {fake.framing_errors} read(s) a vanilla server would drop the connection on")
+        status = 1
+    if args.max_loop_lag_ms and max(monitor.lags, default=0) * 1000 > args.max_loop_lag_ms:
+        print(f"FAIL: event loop lag exceeded {args.max_loop_lag_ms} ms")
+        status = 1
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--apps", type=int, default=200, help="number of applications to submit")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent handlers per phase")
+    parser.add_argument("--players", type=int, default=10, help="players in the fake `list` reply")
+    parser.add_argument("--status-polls", type=int, default=20)
+    parser.add_argument("--rcon-latency", type=float, default=0.01, help="seconds per RCON command")
+    parser.add_argument("--rcon-jitter", type=float, default=0.0)
+    parser.add_argument("--rcon-failure-rate", type=float, default=0.0, help="chance a command drops the connection")
+    parser.add_argument("--discord-latency", type=float, default=0.03, help="seconds per simulated REST call")
+    parser.add_argument("--lean-members", action="store_true", help="simulate MEMBER_CACHE_MODE=lean (no member cache)")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=0, help="exit non-zero if the loop blocks longer")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
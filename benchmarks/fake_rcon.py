@@ -0,0 +1,125 @@
+"""In-process fake Minecraft RCON server for benchmarks.
+
+Speaks the real RCON wire protocol (auth, command, multi-packet replies) and
+understands just enough commands to drive the bot: whitelist add/remove/list,
+list, ban, pardon, kick and tellraw. Latency, failures and the `list` payload
+are configurable.
+
+Framing follows vanilla's RconClient: one read of at most 1460 bytes per
+packet, and a read that does not hold exactly one packet drops the connection,
+so clients that write several packets at once fail here as they would live.
+"""
+import asyncio
+import random
+import struct
+
+SERVERDATA_RESPONSE_VALUE = 0
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_AUTH = 3
+MAX_PAYLOAD = 4096
+MAX_READ = 1460  # vanilla's receive buffer
+
+
+class FakeRconServer:
+    def __init__(self, password: str = "bench", latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, players=None, max_players: int = 20):
+        self.password = password
+        self.latency, self.jitter = latency, jitter
+        self.failure_rate = failure_rate  # chance that a command drops the connection instead of answering
+        self.players = list(players or [])
+        self.max_players = max_players
+        self.whitelist = set()
+        self.banned = set()
+        self.commands = 0
+        self.connections = 0
+        self.framing_errors = 0  # reads that held a partial packet or more than one
+        self._server = None
+        self._writers = set()
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    async def stop(self):
+        for writer in list(self._writers): writer.close()
+        await asyncio.sleep(0)  # let the handlers see EOF and exit
+        self._server.close()
+        await self._server.wait_closed()
+
+    # --- Command emulation ---
+
+    def list_reply(self) -> str:
+        return f"There are {len(self.players)} of a max of {self.max_players} players online: {', '.join(self.players)}"
+
+    def execute(self, command: str) -> str:
+        parts = command.split()
+        if not parts: return ""
+        name = parts[1] if len(parts) > 1 else ""
+        if parts[0] == "list": return self.list_reply()
+        if parts[:2] == ["whitelist", "add"]:
+            target = parts[2]
+            if target.lower() in self.whitelist: return "Player is already whitelisted"
+            self.whitelist.add(target.lower())
+            return f"Added {target} to the whitelist"
+        if parts[:2] == ["whitelist", "remove"]:
+            self.whitelist.discard(parts[2].lower())
+            return f"Removed {parts[2]} from the whitelist"
+        if parts[:2] == ["whitelist", "list"]:
+            return f"There are {len(self.whitelist)} whitelisted player(s): {', '.join(sorted(self.whitelist))}"
+        if parts[0] == "ban":
+            self.banned.add(name.lower())
+            return f"Banned {name}: {' '.join(parts[2:]) or 'Banned by an operator.'}"
+        if parts[0] == "pardon":
+            self.banned.discard(name.lower())
+            return f"Unbanned {name}"
+        if parts[0] == "kick":
+            return f"Kicked {name}: {' '.join(parts[2:]) or 'Kicked by an operator.'}" if name in self.players else "No player was found"
+        if parts[0] == "tellraw": return ""
+        return f"Unknown or incomplete command, see below for error: {command}"
+
+    # --- Wire protocol ---
+
+    @staticmethod
+    def _packet(request_id: int, packet_type: int, payload: str) -> bytes:
+        body = struct.pack("<ii", request_id, packet_type) + payload.encode("utf-8") + b"\x00\x00"
+        return struct.pack("<i", len(body)) + body
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        authed = False
+        try:
+            while True:
+                data = await reader.read(MAX_READ)
+                if not data: return
+                if len(data) < 10 or struct.unpack("<i", data[:4])[0] != len(data) - 4:
+                    self.framing_errors += 1
+                    return
+                request_id, packet_type = struct.unpack("<ii", data[4:12])
+                payload = data[12:-2].decode("utf-8", "replace")
+                if packet_type == SERVERDATA_AUTH:
+                    authed = payload == self.password
+                    writer.write(self._packet(request_id if authed else -1, SERVERDATA_AUTH_RESPONSE, ""))
+                elif packet_type == SERVERDATA_EXECCOMMAND and authed:
+                    self.commands += 1
+                    if self.latency or self.jitter:
+                        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+                    if random.random() < self.failure_rate:
+                        return
+                    reply = self.execute(payload)
+                    # Split long replies the way Minecraft does
+                    for i in range(0, max(len(reply), 1), MAX_PAYLOAD):
+                        writer.write(self._packet(request_id, SERVERDATA_RESPONSE_VALUE, reply[i:i + MAX_PAYLOAD]))
+                else:
+                    writer.write(self._packet(request_id, SERVERDATA_RESPONSE_VALUE, f"Unknown request {packet_type:x}"))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -1,13 +1,30 @@
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import json
 import os
 import asyncio
-from mcrcon import MCRcon
+import io
+import ipaddress
+import socket
 from dotenv import load_dotenv
 import time 
-import re
 from itertools import cycle 
+from rcon_pool import RconGroup, RconError
+from admission import ADMITTED, QUEUED as HELD, THROTTLED, SubmissionGate
+from atomic_file import atomic_write
+from bulk_moderation import parse_bulk_rows, render_results_csv, run_bulk, tally
+from guild_config import CHANNEL_FIELDS, GuildConfigStore
+from app_store import ApplicationStore, PENDING, APPROVED, REJECTED, QUEUED
+from pending_actions import PendingQueue, PendingActionWorker
+from log_dispatcher import LogDispatcher
+from member_cache import MemberCache
+from metrics import LoopLagSampler, metrics
+from reconcile import ReconcileJob, fetch_all_members, parse_whitelist_list
+from sessions import SessionTracker
+from startup import StartupTimer, sync_if_changed
+from status_engine import AdaptivePoller, OFFLINE, StatusScheduler, merge_statuses, parse_list
+from whitelist_mirror import WhitelistMirror
 
 # --- CONFIGURATION ---
 load_dotenv()
@@ -15,16 +32,36 @@ TOKEN = os.getenv("BOT_TOKEN")
 RCON_HOST = os.getenv("RCON_HOST")
 RCON_PORT = int(os.getenv("RCON_PORT", 25575))
 RCON_PASSWORD = os.getenv("RCON_PASSWORD")
+RCON_POOL_SIZE = int(os.getenv("RCON_POOL_SIZE", 2))
+RCON_TIMEOUT = float(os.getenv("RCON_TIMEOUT", 5))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 8))  # /bulk_moderate rows in flight at once (connections per server)
+WHITELIST_PATH = os.getenv("WHITELIST_PATH")
+MEMBER_CACHE_MODE = os.getenv("MEMBER_CACHE_MODE", "full").lower()  # "lean": no gateway member cache, fetch on demand
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", 600))
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", 1000))
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # 0 = no HTTP endpoint
+METRICS_FILE = os.getenv("METRICS_FILE")          # Prometheus textfile, rewritten every 15s
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "").lower() in ("1", "true", "yes")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None                      # unset: ask Discord
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None  # shards run by this process
+STATUS_CONCURRENCY = int(os.getenv("STATUS_CONCURRENCY", 8))               # live status polls in flight at once
+SUBMIT_USER_BURST = int(os.getenv("SUBMIT_USER_BURST", 2))                   # applications a user can send back to back
+SUBMIT_USER_INTERVAL = float(os.getenv("SUBMIT_USER_INTERVAL", 900))         # seconds for a user to earn another one
+SUBMIT_GUILD_BURST = int(os.getenv("SUBMIT_GUILD_BURST", 5))                 # applications posted at once per guild
+SUBMIT_GUILD_INTERVAL = float(os.getenv("SUBMIT_GUILD_INTERVAL", 3))         # seconds between posts once over the burst
+SUBMIT_QUEUE_SIZE = int(os.getenv("SUBMIT_QUEUE_SIZE", 100))                 # held applications per guild before refusing
 
 # !!! --- USER CONFIGURATION --- !!!
 BOT_DEV_ID = 891355913271771146  
 
-# Server details for the "Connect" buttons
+# Server details for the "Connect" buttons of the original guild (imported like the IDs below)
 SERVER_IP = "140.245.16.178" 
 SERVER_PORT_JAVA = "25565"
 SERVER_PORT_BEDROCK = "25565"
 
 # --- BOT & SERVER IDS ---
+# Settings of the original guild. They are imported into the per-guild config store on first
+# start; after that every guild is configured with the /config_* commands.
 MC_WL_CHANNEL_ID = 1438763824760225882
 REVIEW_CHANNEL_ID = 1438763882154819624
 APPROVED_CHANNEL_ID = 1438763962496712764
@@ -34,8 +71,17 @@ MC_WHITELISTED_ROLE_ID = 1438789711023046718
 DEV_ROLE_NAME = "Staff"
 
 # Files to store data
-ADMIN_FILE = "mc_admins.json"
-STATUS_FILE = "status_config.json"
+ADMIN_FILE = "mc_admins.json"  # legacy global admin list, imported into the home guild once
+STATUS_FILE = "status_config.json"  # legacy live status location, imported once
+GUILD_CONFIG_DB = "guild_config.db"
+RCON_SERVERS_FILE = "rcon_servers.json"  # optional: [{"name", "host", "port", "password"}, ...] for proxy networks
+APPLICATIONS_DB = "applications.db"
+PENDING_ACTIONS_DB = "pending_actions.db"
+RECONCILE_STATE_FILE = "reconcile_state_{guild_id}.json"
+RECONCILE_LAST_RUN_FILE = "reconcile_last_run_{guild_id}.json"  # when the last full reconcile finished
+RECONCILE_INTERVAL = 6 * 3600
+COMMAND_HASH_FILE = "command_tree_hash.json"  # hash of the last synced slash commands
+SESSIONS_DIR = "sessions"  # playtime ring buffers (raw numeric files)
 
 # --- AESTHETICS ---
 SERVER_ICON_URL = "https://cdn.discordapp.com/icons/1132719558231793744/a_d78d4615a72f0b7c7ed14b301c34a243.gif"
@@ -53,7 +99,93 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+member_cache_options = {}
+if MEMBER_CACHE_MODE == "lean":
+    # Large guilds: don't chunk or keep every member in memory; MemberCache fetches the few we need
+    member_cache_options = {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+bot = commands.AutoShardedBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS,
+                              **member_cache_options)
+
+def load_rcon_servers():
+    if os.path.exists(RCON_SERVERS_FILE):
+        with open(RCON_SERVERS_FILE, "r") as f: return json.load(f)
+    return [{"name": "main", "host": RCON_HOST, "port": RCON_PORT, "password": RCON_PASSWORD}]
+
+# Process-wide servers: used by guilds the bot dev grants `use_default_rcon` (the original guild on import)
+rcon = RconGroup.from_config(load_rcon_servers(), size=RCON_POOL_SIZE, timeout=RCON_TIMEOUT)
+guild_configs = GuildConfigStore(GUILD_CONFIG_DB)
+
+# --- INSTRUMENTATION ---
+
+def rcon_command_type(command: str):
+    parts = command.split()
+    if not parts: return "empty"
+    return " ".join(parts[:2]) if parts[0] == "whitelist" else parts[0]
+
+def record_rcon(server, command, seconds, error):
+    kind = rcon_command_type(command)
+    metrics.observe("rcon_command_seconds", seconds, server=server, command=kind)
+    metrics.inc("rcon_commands_total", server=server, command=kind, result=type(error).__name__ if error else "ok")
+
+rcon.observers.append(record_rcon)
+
+rcon_groups = {}  # guild id -> RconGroup for guilds with their own servers
+
+def rcon_for(guild_id):
+    """The RconGroup a guild's commands go to, or None if it has no servers configured."""
+    cfg = guild_configs.get(guild_id)
+    if cfg is None or not cfg.has_rcon:
+        # Actions queued before per-guild configs carry no guild ID; they were meant for the default servers
+        return rcon if guild_id is None else None
+    if cfg.use_default_rcon: return rcon
+    group = rcon_groups.get(guild_id)
+    if group is None:
+        # Connect to the checked address, not the name: the name could be re-pointed at the bot's own network later
+        group = rcon_groups[guild_id] = RconGroup.from_config(cfg.rcon_servers, size=RCON_POOL_SIZE, timeout=RCON_TIMEOUT,
+                                                              resolve=public_address)
+        group.observers.append(record_rcon)
+    return group
+
+def guild_channels(guild_id, *fields):
+    """The configured channel IDs for `fields` in a guild, skipping unset ones."""
+    cfg = guild_configs.get(guild_id)
+    if cfg is None: return ()
+    return tuple(cid for cid in (getattr(cfg, field) for field in fields) if cid)
+
+def whitelisted_role(guild):
+    cfg = guild_configs.get(guild.id)
+    return guild.get_role(cfg.whitelisted_role_id) if cfg and cfg.whitelisted_role_id else None
+
+def home_guild_id():
+    """The guild the module-level IDs above belong to (None until its channels are cached)."""
+    channel = bot.get_channel(REVIEW_CHANNEL_ID)
+    return channel.guild.id if channel else None
+
+def serves_guild(guild_id):
+    """True if this process runs the shard that owns `guild_id` (None stands for the home guild)."""
+    if SHARD_IDS is None: return True  # one process runs every shard
+    if guild_id is None: guild_id = home_guild_id()
+    return guild_id is not None and (guild_id >> 22) % bot.shard_count in SHARD_IDS
+
+NO_RCON = "❌ RCON is not configured for this server (see `/config_rcon_add`)."
+
+# Every Discord REST call (fetch_user, fetch_message, send, edit, ...) goes through HTTPClient.request
+_http_request = bot.http.request
+
+async def instrumented_request(route, *args, **kwargs):
+    with metrics.timer("discord_rest_seconds", route=f"{route.method} {route.path}"):
+        return await _http_request(route, *args, **kwargs)
+
+bot.http.request = instrumented_request
+
+def timed_handler(func):
+    """Records latency and errors of an interaction handler under its qualified name."""
+    return metrics.track("interaction_handler_seconds", handler=func.__qualname__)(func)
+
+loop_lag_sampler = LoopLagSampler(metrics)
+startup_timer = StartupTimer(metrics)
+app_store = ApplicationStore(APPLICATIONS_DB)
+whitelist_mirror = WhitelistMirror(WHITELIST_PATH) if WHITELIST_PATH else None
 
 # Bot Status Cycle
 bot_statuses = cycle([
@@ -68,47 +200,82 @@ bot_statuses = cycle([
 
 # --- HELPER FUNCTIONS (JSON & RCON) ---
 
-def load_admins():
-    if not os.path.exists(ADMIN_FILE):
-        with open(ADMIN_FILE, "w") as f: json.dump([], f)
-        return []
-    try:
-        with open(ADMIN_FILE, "r") as f: return json.load(f)
-    except: return []
-
-def save_admins(admin_list):
-    with open(ADMIN_FILE, "w") as f: json.dump(admin_list, f)
-
 def is_bot_dev(user_id):
     return user_id == BOT_DEV_ID
 
-def is_mc_admin(user_id):
-    admins = load_admins()
-    return user_id in admins or is_bot_dev(user_id)
+def is_mc_admin(user_id, guild_id):
+    """MC admins are per guild: they moderate that guild's servers only."""
+    if is_bot_dev(user_id): return True
+    cfg = guild_configs.get(guild_id)
+    return cfg is not None and user_id in cfg.mc_admin_ids
+
+def can_configure(interaction: discord.Interaction):
+    return is_bot_dev(interaction.user.id) or (interaction.guild is not None and interaction.user.guild_permissions.manage_guild)
 
-def rcon_command(command):
-    """Helper to send raw RCON commands."""
+def can_manage_admins(interaction: discord.Interaction):
+    """Admins of a guild on the default servers moderate the bot's own servers, so only the bot dev picks them there."""
+    cfg = guild_configs.get(interaction.guild_id)
+    if cfg is not None and cfg.use_default_rcon: return is_bot_dev(interaction.user.id)
+    return can_configure(interaction)
+
+async def rcon_command(command, group=None):
+    """Helper to send raw RCON commands to the primary server (of `group`, default: the process-wide servers) over the shared connection pool."""
     try:
-        with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-            resp = mcr.command(command)
-            return resp
-    except Exception as e:
+        return await (group or rcon).command(command)
+    except RconError as e:
         print(f"RCON Error ({command}): {e}")
         return None
 
-def add_player_via_rcon(username: str, device: str):
-    """Adds a player to the server's whitelist using RCON."""
+async def rcon_broadcast(command, group=None):
+    """Runs a command on every server of `group` concurrently. Returns {server: reply or None}."""
+    replies = await (group or rcon).broadcast(command)
+    for server, resp in replies.items():
+        if isinstance(resp, RconError): print(f"RCON Error [{server}] ({command}): {resp}")
+    return {server: None if isinstance(resp, RconError) else resp for server, resp in replies.items()}
+
+async def rcon_command_all(command, group=None):
+    """Fan-out variant of rcon_command: the first reply received, or None if no server answered."""
+    replies = await rcon_broadcast(command, group)
+    return next((resp for resp in replies.values() if resp is not None), None)
+
+def get_whitelist_name(username: str, device: str):
+    """Returns the name a player is whitelisted under (Bedrock players get the "1" prefix)."""
     original_username = username.strip()
-    final_username = original_username
     if "bedrock" in device.lower():
-        final_username = f"1{original_username}"
+        return f"1{original_username}"
+    return original_username
+
+def is_whitelisted_locally(name: str, group):
+    # The mirror reads the default servers' whitelist file, so it says nothing about other groups (or a guild with none)
+    return group is rcon and whitelist_mirror is not None and name in whitelist_mirror
+
+def parse_whitelist_add(resp: str):
+    """Maps a `whitelist add` reply to "success", "already_whitelisted" or "failed"."""
+    if "already whitelisted" in resp.lower(): return "already_whitelisted"
+    elif "added" in resp.lower(): return "success"
+    return "failed"
+
+async def add_player_via_rcon(username: str, device: str, group=None):
+    """Adds a player to the whitelist of every server in `group` using RCON.
+    Returns (status, final_username, unreachable servers). The status is "rcon_error" only when
+    no server could be reached, and "failed" if any server refused the command."""
+    final_username = get_whitelist_name(username, device)
+    # The mirror only reflects the primary server's file, so it can only short-circuit a single server
+    group = group or rcon
+    if len(group.names) == 1 and is_whitelisted_locally(final_username, group): return "already_whitelisted", final_username, []
     
-    resp = rcon_command(f"whitelist add {final_username}")
-    if resp is None: return "rcon_error", final_username
+    replies = await rcon_broadcast(f"whitelist add {final_username}", group)
+    unreachable = [server for server, resp in replies.items() if resp is None]
+    if len(unreachable) == len(replies): return "rcon_error", final_username, unreachable
     
-    if "already whitelisted" in resp.lower(): return "already_whitelisted", final_username
-    elif "added" in resp.lower(): return "success", final_username
-    else: return "rcon_error", final_username
+    statuses = {parse_whitelist_add(resp) for resp in replies.values() if resp is not None}
+    if "failed" in statuses: return "failed", final_username, unreachable
+    status = "success" if "success" in statuses else "already_whitelisted"
+    if whitelist_mirror is not None and group is rcon: whitelist_mirror.add_local(final_username)
+    return status, final_username, unreachable
+
+member_cache = MemberCache(bot, ttl=MEMBER_CACHE_TTL, max_size=MEMBER_CACHE_SIZE)
+log_dispatcher = LogDispatcher(bot, resolve_avatar=member_cache.avatar_url)
 
 def get_app_data_from_embed(embed: discord.Embed):
     user_id, mc_username, device = None, None, "Java"
@@ -118,63 +285,154 @@ def get_app_data_from_embed(embed: discord.Embed):
         elif "Edition" in field.name: device = field.value
     return user_id, mc_username, device
 
+def get_application(message: discord.Message):
+    """Looks up the application behind a review message.
+    Review messages posted before the store existed are imported from their embed once."""
+    app = app_store.get_by_message(message.id)
+    if app: return app
+    user_id, mc_username, device = get_app_data_from_embed(message.embeds[0])
+    if user_id is None or not mc_username: return None
+    return app_store.create(user_id, str(user_id), mc_username, device, review_message_id=message.id,
+                            created_at=message.created_at.timestamp(), guild_id=message.guild.id if message.guild else None)
+
+async def run_moderation_command(interaction: discord.Interaction, kind: str, cmd: str):
+    """Runs a ban/pardon/kick command on every server of the guild, queueing it for the ones that are unreachable."""
+    group = rcon_for(interaction.guild_id)
+    if group is None: return await interaction.followup.send(NO_RCON, ephemeral=True)
+    replies = await rcon_broadcast(cmd, group)
+    lines = []
+    for server, resp in replies.items():
+        prefix = f"[{server}] " if len(replies) > 1 else ""
+        if resp is None:
+            pending_worker.submit(kind, cmd, {"moderator_id": interaction.user.id, "server": server, "guild_id": interaction.guild_id})
+            lines.append(f"⏳ **{prefix}Queued:** server unreachable, `{cmd}` will run once it is back.")
+        else:
+            lines.append(f"**{prefix}Console:** `{resp}`")
+    await interaction.followup.send("\n".join(lines), ephemeral=True)
+
 # --- 1. ADMIN PANEL MODALS (Kept from your Original Code) ---
 class BanModal(discord.ui.Modal, title="🔨 Ban Player"):
     username = discord.ui.TextInput(label="Minecraft Username")
     reason = discord.ui.TextInput(label="Reason", style=discord.TextStyle.paragraph)
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        resp = rcon_command(f"ban {self.username.value} {self.reason.value}")
-        await interaction.followup.send(f"**Console:** `{resp}`", ephemeral=True)
+        await run_moderation_command(interaction, "ban", f"ban {self.username.value} {self.reason.value}")
 
 class UnbanModal(discord.ui.Modal, title="🔓 Unban Player"):
     username = discord.ui.TextInput(label="Minecraft Username")
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        resp = rcon_command(f"pardon {self.username.value}")
-        await interaction.followup.send(f"**Console:** `{resp}`", ephemeral=True)
+        await run_moderation_command(interaction, "pardon", f"pardon {self.username.value}")
 
 class BroadcastModal(discord.ui.Modal, title="📢 Broadcast Message"):
     message = discord.ui.TextInput(label="Message", style=discord.TextStyle.paragraph)
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        rcon_command(f'tellraw @a {{"text":"{self.message.value}","color":"aqua"}}')
-        await interaction.followup.send(f"📢 Sent: `{self.message.value}`", ephemeral=True)
+        group = rcon_for(interaction.guild_id)
+        if group is None: return await interaction.followup.send(NO_RCON, ephemeral=True)
+        replies = await rcon_broadcast(f'tellraw @a {{"text":"{self.message.value}","color":"aqua"}}', group)
+        msg = f"📢 Sent: `{self.message.value}`"
+        missed = [server for server, resp in replies.items() if resp is None]
+        if missed: msg += f"\n⚠️ Not delivered to: {', '.join(missed)}"
+        await interaction.followup.send(msg, ephemeral=True)
 
 class KickModal(discord.ui.Modal, title="💀 Kick Player"):
     username = discord.ui.TextInput(label="Minecraft Username")
     reason = discord.ui.TextInput(label="Reason", required=False)
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         cmd = f"kick {self.username.value} {self.reason.value}" if self.reason.value else f"kick {self.username.value}"
-        resp = rcon_command(cmd)
-        await interaction.followup.send(f"**Console:** `{resp}`", ephemeral=True)
+        await run_moderation_command(interaction, "kick", cmd)
 
 # --- 2. WHITELIST MODALS (UPDATED) ---
+def review_channel_for(guild_id):
+    return bot.get_channel(next(iter(guild_channels(guild_id, "review_channel_id")), None))
+
+async def post_application(app, review_channel, user=None):
+    """Posts the review embed for a stored application. The application is dropped if that fails."""
+    embed = discord.Embed(title="📝 New Whitelist Application", color=EMBED_COLORS["pending"], timestamp=discord.utils.utcnow())
+    if user: embed.set_author(name=user.display_name, icon_url=user.display_avatar.url)
+    else: embed.set_author(name=app.username)
+    embed.add_field(name="👤 Applicant", value=f"<@{app.user_id}> (`{app.user_id}`)", inline=False)
+    embed.add_field(name="⛏️ Minecraft Username", value=app.mc_username, inline=False)
+    embed.add_field(name="🎮 Edition", value=app.edition, inline=True)
+    embed.add_field(name="🗓️ Played Before?", value=app.played_before, inline=True)
+    if app.notes:
+        embed.add_field(name="🗒️ Notes", value=app.notes, inline=False)
+    embed.set_footer(text="Status: Pending Review", icon_url=SERVER_ICON_URL)
+
+    try:
+        review_msg = await review_channel.send(embed=embed, view=ReviewView())
+    except Exception:
+        app_store.delete(app.id)
+        raise
+    app_store.attach_message(app.id, review_msg.id)
+
+async def release_submission(app_id):
+    """Posts an application that was held back by admission control."""
+    metrics.set("submission_queue_depth", len(submission_gate))
+    app = app_store.get(app_id)
+    if app is None or app.status != PENDING or app.review_message_id: return  # withdrawn or decided meanwhile
+    review_channel = review_channel_for(app.guild_id)
+    if review_channel is None:
+        app_store.delete(app.id)
+        return print(f"Submission Release Error: no review channel for guild {app.guild_id}")
+    await post_application(app, review_channel, await member_cache.get_user(app.user_id))
+
+submission_gate = SubmissionGate(release_submission, user_rate=1 / SUBMIT_USER_INTERVAL, user_burst=SUBMIT_USER_BURST,
+                                 guild_rate=1 / SUBMIT_GUILD_INTERVAL, guild_burst=SUBMIT_GUILD_BURST, queue_size=SUBMIT_QUEUE_SIZE)
+
+def requeue_unposted():
+    """Holds applications that were still waiting in the overflow queue when the bot stopped."""
+    for app in app_store.unposted():
+        if serves_guild(app.guild_id): submission_gate.requeue(app.guild_id, app.id)
+    metrics.set("submission_queue_depth", len(submission_gate))
+
 class WhitelistModal(discord.ui.Modal, title="Minecraft Whitelist Application"):
     mc_username = discord.ui.TextInput(label="Minecraft Username (Case-Sensitive)", placeholder="Steve123")
     device = discord.ui.TextInput(label="Edition (Java / Bedrock)", placeholder="Java")
     played_before = discord.ui.TextInput(label="Played Minecraft before? (Yes / No)", placeholder="Yes")
     notes = discord.ui.TextInput(label="Anything you'd like to add?", required=False, style=discord.TextStyle.paragraph, max_length=500)
 
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
-        mc_role = interaction.guild.get_role(MC_WHITELISTED_ROLE_ID)
+        review_channel = review_channel_for(interaction.guild_id)
+        if review_channel is None:
+            return await interaction.response.send_message("❌ Whitelist applications are not set up in this server.", ephemeral=True)
+        mc_role = whitelisted_role(interaction.guild)
         if mc_role and mc_role in interaction.user.roles:
             return await interaction.response.send_message("You are already whitelisted and cannot reapply.", ephemeral=True)
+        if is_whitelisted_locally(get_whitelist_name(self.mc_username.value, self.device.value), rcon_for(interaction.guild_id)):
+            return await interaction.response.send_message("⚠️ This Minecraft username is already whitelisted.", ephemeral=True)
+        if app_store.pending_for_user(interaction.user.id, interaction.guild_id):
+            return await interaction.response.send_message("⏳ You already have an application pending review.", ephemeral=True)
+        if app_store.pending_for_username(self.mc_username.value, interaction.guild_id):
+            return await interaction.response.send_message("⚠️ An application for this Minecraft username is already pending review.", ephemeral=True)
 
-        embed = discord.Embed(title="📝 New Whitelist Application", color=EMBED_COLORS["pending"], timestamp=discord.utils.utcnow())
-        embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.display_avatar.url)
-        embed.add_field(name="👤 Applicant", value=f"{interaction.user.mention} (`{interaction.user.id}`)", inline=False)
-        embed.add_field(name="⛏️ Minecraft Username", value=self.mc_username.value, inline=False)
-        embed.add_field(name="🎮 Edition", value=self.device.value, inline=True)
-        embed.add_field(name="🗓️ Played Before?", value=self.played_before.value, inline=True)
-        if self.notes.value:
-            embed.add_field(name="🗒️ Notes", value=self.notes.value, inline=False)
-        embed.set_footer(text="Status: Pending Review", icon_url=SERVER_ICON_URL)
+        app = app_store.create(interaction.user.id, interaction.user.name, self.mc_username.value, self.device.value,
+                               played_before=self.played_before.value, notes=self.notes.value or None, guild_id=interaction.guild_id)
+        member_cache.put(interaction.user)  # saves a fetch when the application is reviewed
 
-        review_channel = bot.get_channel(REVIEW_CHANNEL_ID)
-        await review_channel.send(embed=embed, view=ReviewView())
-        await interaction.response.send_message("✅ Your application has been submitted for review!", ephemeral=True)
+        # Stored before admission so a held application already counts as pending for the duplicate checks
+        decision = submission_gate.admit(interaction.guild_id, interaction.user.id, app.id)
+        metrics.inc("submissions_total", result=decision.result)
+        if decision.result == ADMITTED:
+            await post_application(app, review_channel, interaction.user)
+            return await interaction.response.send_message("✅ Your application has been submitted for review!", ephemeral=True)
+        if decision.result == HELD:
+            metrics.set("submission_queue_depth", len(submission_gate))
+            return await interaction.response.send_message(
+                f"✅ Your application has been received! Lots of people are applying right now, so it is **#{decision.position}** in line "
+                f"and will be posted for review <t:{int(time.time() + decision.wait) + 1}:R>.", ephemeral=True)
+        app_store.delete(app.id)
+        retry_at = f"<t:{int(time.time() + decision.retry_after) + 1}:R>"
+        if decision.result == THROTTLED:
+            return await interaction.response.send_message(f"⏳ You are applying too often. Please try again {retry_at}.", ephemeral=True)
+        await interaction.response.send_message(f"🚧 The review queue is full right now. Please try again {retry_at}.", ephemeral=True)
 
 class RejectionModal(discord.ui.Modal, title="Rejection Reason"):
     reason = discord.ui.TextInput(label="Please provide the reason for rejection.", style=discord.TextStyle.paragraph, min_length=10)
@@ -183,11 +441,18 @@ class RejectionModal(discord.ui.Modal, title="Rejection Reason"):
         super().__init__()
         self.original_interaction = original_interaction
 
+    @timed_handler
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
-        # Update original Review Message
         review_message = self.original_interaction.message
+        app = get_application(review_message)
+        if not app:
+            return await interaction.followup.send("❌ Could not find the application for this message.", ephemeral=True)
+        if not app_store.decide(app.id, REJECTED, interaction.user.id, reason=self.reason.value):
+            return await interaction.followup.send(f"⚠️ This application was already {app_store.get(app.id).status}.", ephemeral=True)
+
+        # Update original Review Message
         original_embed = review_message.embeds[0]
         original_embed.color = EMBED_COLORS["error"]
         original_embed.set_footer(text=f"Rejected by {interaction.user.display_name}", icon_url=SERVER_ICON_URL)
@@ -195,15 +460,10 @@ class RejectionModal(discord.ui.Modal, title="Rejection Reason"):
         await review_message.edit(embed=original_embed, view=None)
 
         # Get Data for Logging
-        user_id, mc_username, _ = get_app_data_from_embed(original_embed)
-        try:
-            member = await bot.fetch_user(user_id)
-        except:
-            member = None
+        user_id, mc_username = app.user_id, app.mc_username
         
         # Create Fancy Log Embed
         log_embed = discord.Embed(title="❌ Application Rejected", description=f"<@{user_id}>'s application was rejected.", color=EMBED_COLORS["error"])
-        if member: log_embed.set_thumbnail(url=member.display_avatar.url)
         log_embed.add_field(name="👤 Applicant", value=f"<@{user_id}> (`{user_id}`)", inline=False)
         log_embed.add_field(name="⛏️ Minecraft Username", value=mc_username, inline=False)
         log_embed.add_field(name="📝 Reason", value=self.reason.value, inline=False)
@@ -211,9 +471,8 @@ class RejectionModal(discord.ui.Modal, title="Rejection Reason"):
         log_embed.add_field(name="⏰ Timestamp", value=f"<t:{int(time.time())}:F>", inline=True)
         log_embed.set_footer(text=f"{interaction.guild.name} | Whitelist Logs", icon_url=SERVER_ICON_URL)
         
-        # Send Logs
-        await bot.get_channel(REJECTED_CHANNEL_ID).send(embed=log_embed)
-        await bot.get_channel(LOG_CHANNEL_ID).send(embed=log_embed)
+        # Send Logs (in the background)
+        log_dispatcher.submit(guild_channels(interaction.guild_id, "rejected_channel_id", "log_channel_id"), log_embed, thumbnail_user_id=user_id)
         await interaction.followup.send("Application has been rejected.", ephemeral=True)
 
 # --- VIEWS ---
@@ -222,80 +481,125 @@ class AdminPanelView(discord.ui.View):
     def __init__(self): super().__init__(timeout=None)
     
     async def check(self, interaction):
-        if not is_mc_admin(interaction.user.id):
+        if not is_mc_admin(interaction.user.id, interaction.guild_id):
             await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
             return False
         return True
 
     @discord.ui.button(label="Ban", style=discord.ButtonStyle.danger, emoji="🔨", row=0, custom_id="ap_ban")
+    @timed_handler
     async def ban(self, interaction, button): 
         if await self.check(interaction): await interaction.response.send_modal(BanModal())
 
     @discord.ui.button(label="Unban", style=discord.ButtonStyle.success, emoji="🔓", row=0, custom_id="ap_unban")
+    @timed_handler
     async def unban(self, interaction, button):
         if await self.check(interaction): await interaction.response.send_modal(UnbanModal())
         
     @discord.ui.button(label="Kick", style=discord.ButtonStyle.secondary, emoji="💀", row=1, custom_id="ap_kick")
+    @timed_handler
     async def kick(self, interaction, button):
         if await self.check(interaction): await interaction.response.send_modal(KickModal())
 
     @discord.ui.button(label="Broadcast", style=discord.ButtonStyle.primary, emoji="📢", row=1, custom_id="ap_say")
+    @timed_handler
     async def say(self, interaction, button):
         if await self.check(interaction): await interaction.response.send_modal(BroadcastModal())
 
 class ConnectView(discord.ui.View):
     def __init__(self): super().__init__(timeout=None)
     
+    async def address(self, interaction):
+        cfg = guild_configs.get(interaction.guild_id)
+        if cfg and cfg.server_address: return cfg
+        await interaction.response.send_message("❌ The server address has not been set up yet.", ephemeral=True)
+        return None
+    
     @discord.ui.button(label="Connect (Java)", style=discord.ButtonStyle.blurple, custom_id="conn_java", emoji="☕")
+    @timed_handler
     async def java(self, interaction, button):
-        msg = f"**☕ Java Connection:**\nIP: `{SERVER_IP}:{SERVER_PORT_JAVA}`"
+        cfg = await self.address(interaction)
+        if not cfg: return
+        msg = f"**☕ Java Connection:**\nIP: `{cfg.server_address}:{cfg.java_port or 25565}`"
         await interaction.response.send_message(msg, ephemeral=True)
         
     @discord.ui.button(label="Connect (Bedrock)", style=discord.ButtonStyle.green, custom_id="conn_bedrock", emoji="📱")
+    @timed_handler
     async def bedrock(self, interaction, button):
-        msg = f"**📱 Bedrock Connection:**\nIP: `{SERVER_IP}`\nPort: `{SERVER_PORT_BEDROCK}`"
+        cfg = await self.address(interaction)
+        if not cfg: return
+        msg = f"**📱 Bedrock Connection:**\nIP: `{cfg.server_address}`\nPort: `{cfg.bedrock_port or 19132}`"
         await interaction.response.send_message(msg, ephemeral=True)
 
+def queue_whitelist_sync(final_username: str, servers, moderator_id: int, guild_id: int):
+    for server in servers:
+        pending_worker.submit("whitelist_sync", f"whitelist add {final_username}",
+                              {"moderator_id": moderator_id, "server": server, "guild_id": guild_id})
+
+async def finalize_approval(guild: discord.Guild, message: discord.Message, app, reviewer, final_username: str):
+    """Grants the whitelisted role, marks the review message (if still there) approved and queues the logs."""
+    user_id = app.user_id
+    
+    # Add Role
+    member = await member_cache.get_member(guild, user_id)
+    mc_role = whitelisted_role(guild)
+    if member and mc_role: await member.add_roles(mc_role)
+    
+    # Update Review Embed (best effort: the application is decided either way)
+    if message is not None:
+        embed = message.embeds[0]
+        embed.color = EMBED_COLORS["success"]
+        embed.set_footer(text=f"Approved by {reviewer.display_name}", icon_url=SERVER_ICON_URL)
+        embed.timestamp = discord.utils.utcnow()
+        try: await message.edit(embed=embed, view=None)
+        except discord.HTTPException as e: print(f"Review Message Error ({message.id}): {e}")
+    
+    # Create Fancy Log Embed
+    log_embed = discord.Embed(title="✅ Application Approved", description=f"<@{user_id}>'s application has been approved!", color=EMBED_COLORS["success"])
+    log_embed.add_field(name="👤 Applicant", value=f"<@{user_id}> (`{user_id}`)", inline=False)
+    log_embed.add_field(name="⛏️ Whitelisted As", value=f"`{final_username}`", inline=False)
+    log_embed.add_field(name="👨‍⚖️ Approved By", value=reviewer.mention, inline=True)
+    log_embed.add_field(name="⏰ Timestamp", value=f"<t:{int(time.time())}:F>", inline=True)
+    log_embed.set_footer(text=f"{guild.name} | Whitelist Logs", icon_url=SERVER_ICON_URL)
+    
+    # Send Logs (in the background)
+    log_dispatcher.submit(guild_channels(guild.id, "approved_channel_id", "log_channel_id"), log_embed, thumbnail_user_id=user_id)
+
 class ReviewView(discord.ui.View):
     def __init__(self): super().__init__(timeout=None)
     
     @discord.ui.button(label="Approve", style=discord.ButtonStyle.green, custom_id="review_approve")
+    @timed_handler
     async def approve(self, interaction: discord.Interaction, button):
         await interaction.response.defer(ephemeral=True, thinking=True)
-        user_id, mc_username, device = get_app_data_from_embed(interaction.message.embeds[0])
-        status, final_username = add_player_via_rcon(mc_username, device)
+        app = get_application(interaction.message)
+        if not app:
+            return await interaction.followup.send("❌ Could not find the application for this message.", ephemeral=True)
+        if app.status != PENDING:
+            return await interaction.followup.send(f"⚠️ This application was already {app.status}.", ephemeral=True)
+        group = rcon_for(interaction.guild_id)
+        if group is None: return await interaction.followup.send(NO_RCON, ephemeral=True)
+        status, final_username, unreachable = await add_player_via_rcon(app.mc_username, app.edition, group)
         
-        if status == "rcon_error": 
-            return await interaction.followup.send("❌ **Error:** Could not connect to the server via RCON.", ephemeral=True)
-        
-        # Update Review Embed
-        embed = interaction.message.embeds[0]
-        embed.color = EMBED_COLORS["success"]
-        embed.set_footer(text=f"Approved by {interaction.user.display_name}", icon_url=SERVER_ICON_URL)
-        embed.timestamp = discord.utils.utcnow()
-        await interaction.message.edit(embed=embed, view=None)
+        if status == "failed":
+            return await interaction.followup.send(f"❌ **Error:** The server did not accept `whitelist add {final_username}`.", ephemeral=True)
+        if status == "rcon_error":
+            if not app_store.mark_queued(app.id, interaction.user.id, final_username):
+                return await interaction.followup.send(f"⚠️ This application was already {app_store.get(app.id).status}.", ephemeral=True)
+            # The primary server finishes the approval; the others just catch up
+            pending_worker.submit("whitelist_add", f"whitelist add {final_username}", {
+                "app_id": app.id, "guild_id": interaction.guild_id, "server": group.primary,
+                "channel_id": interaction.channel_id, "message_id": interaction.message.id})
+            queue_whitelist_sync(final_username, [s for s in unreachable if s != group.primary], interaction.user.id, interaction.guild_id)
+            embed = interaction.message.embeds[0]
+            embed.set_footer(text=f"Approved by {interaction.user.display_name} • Queued: waiting for the server", icon_url=SERVER_ICON_URL)
+            await interaction.message.edit(embed=embed, view=None)
+            return await interaction.followup.send(f"⏳ **Queued:** the server is unreachable. `{final_username}` will be whitelisted as soon as it is back.", ephemeral=True)
+        if not app_store.decide(app.id, APPROVED, interaction.user.id, final_username=final_username):
+            return await interaction.followup.send(f"⚠️ This application was already {app_store.get(app.id).status}.", ephemeral=True)
         
-        # Add Role
-        guild = interaction.guild
-        member = guild.get_member(user_id)
-        mc_role = guild.get_role(MC_WHITELISTED_ROLE_ID)
-        if member and mc_role: await member.add_roles(mc_role)
-        
-        try: applicant = await bot.fetch_user(user_id)
-        except: applicant = None
-
-        # Create Fancy Log Embed
-        log_embed = discord.Embed(title="✅ Application Approved", description=f"<@{user_id}>'s application has been approved!", color=EMBED_COLORS["success"])
-        if applicant: log_embed.set_thumbnail(url=applicant.display_avatar.url)
-        log_embed.add_field(name="👤 Applicant", value=f"<@{user_id}> (`{user_id}`)", inline=False)
-        log_embed.add_field(name="⛏️ Whitelisted As", value=f"`{final_username}`", inline=False)
-        log_embed.add_field(name="👨‍⚖️ Approved By", value=interaction.user.mention, inline=True)
-        log_embed.add_field(name="⏰ Timestamp", value=f"<t:{int(time.time())}:F>", inline=True)
-        log_embed.set_footer(text=f"{interaction.guild.name} | Whitelist Logs", icon_url=SERVER_ICON_URL)
-        
-        # Send Logs
-        await bot.get_channel(APPROVED_CHANNEL_ID).send(embed=log_embed)
-        await bot.get_channel(LOG_CHANNEL_ID).send(embed=log_embed)
+        await finalize_approval(interaction.guild, interaction.message, app, interaction.user, final_username)
+        queue_whitelist_sync(final_username, unreachable, interaction.user.id, interaction.guild_id)
         
         if status == "already_whitelisted":
             await interaction.followup.send(f"✅ Player `{final_username}` is already whitelisted. Role re-synced.", ephemeral=True)
@@ -303,90 +607,442 @@ class ReviewView(discord.ui.View):
             await interaction.followup.send(f"✅ Player `{final_username}` added to the whitelist.", ephemeral=True)
 
     @discord.ui.button(label="Reject", style=discord.ButtonStyle.red, custom_id="review_reject")
+    @timed_handler
     async def reject(self, interaction: discord.Interaction, button):
         await interaction.response.send_modal(RejectionModal(original_interaction=interaction))
 
 class WhitelistView(discord.ui.View):
     def __init__(self): super().__init__(timeout=None)
     @discord.ui.button(label="Apply for Whitelist", style=discord.ButtonStyle.primary, custom_id="whitelist_apply_button", emoji="📝")
+    @timed_handler
     async def apply(self, interaction: discord.Interaction, button):
         await interaction.response.send_modal(WhitelistModal())
 
+# --- QUEUED ACTIONS (run once RCON is reachable again) ---
+
+async def fetch_review_message(channel_id, message_id):
+    """The review message, or None if it or its channel is gone (or out of reach)."""
+    try:
+        channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+        return await channel.fetch_message(message_id)
+    except discord.HTTPException as e:
+        print(f"Review Message Error ({message_id}): {e}")
+        return None
+
+async def fail_queued_approval(action, reason):
+    """Hands a queued approval that didn't go through back to the reviewers."""
+    payload = action.payload
+    app = app_store.get(payload["app_id"])
+    if not app or app.status != QUEUED: return
+    message = await fetch_review_message(payload["channel_id"], payload["message_id"])
+    if message is None:
+        # Nothing left to review it from: close it so the applicant can apply again
+        app_store.decide(app.id, REJECTED, app.reviewer_id, reason=f"Queued approval failed: {reason}")
+        return
+    app_store.reopen(app.id)
+    embed = message.embeds[0]
+    embed.set_footer(text=f"Queued approval failed: {reason}", icon_url=SERVER_ICON_URL)
+    try: await message.edit(embed=embed, view=ReviewView())
+    except discord.HTTPException as e: print(f"Review Message Error ({message.id}): {e}")
+
+async def finish_queued_approval(action, reply):
+    # The action is already completed: record the decision before anything that can fail
+    payload = action.payload
+    app = app_store.get(payload["app_id"])
+    if not app or app.status != QUEUED: return
+    if parse_whitelist_add(reply) == "failed": return await fail_queued_approval(action, reply[:100])
+    
+    app_store.decide(app.id, APPROVED, app.reviewer_id, final_username=app.final_username)
+    if whitelist_mirror is not None and rcon_for(payload["guild_id"]) is rcon: whitelist_mirror.add_local(app.final_username)
+    guild = bot.get_guild(payload["guild_id"])
+    if guild is None: return print(f"Queued Approval Error: guild {payload['guild_id']} unavailable, role not granted for #{app.id}")
+    message = await fetch_review_message(payload["channel_id"], payload["message_id"])
+    reviewer = await member_cache.get_member(guild, app.reviewer_id) or await member_cache.get_user(app.reviewer_id)
+    await finalize_approval(guild, message, app, reviewer, app.final_username)
+
+async def finish_queued_moderation(action, reply):
+    log_embed = discord.Embed(title="🕒 Queued Command Executed", color=EMBED_COLORS["admin"])
+    log_embed.add_field(name="⌨️ Command", value=f"`{action.command}`", inline=False)
+    if action.payload.get("server"): log_embed.add_field(name="🖧 Server", value=action.payload["server"], inline=False)
+    log_embed.add_field(name="🖥️ Console", value=f"`{reply or 'No response'}`", inline=False)
+    log_embed.add_field(name="👮 Requested By", value=f"<@{action.payload.get('moderator_id')}>", inline=True)
+    log_embed.add_field(name="⏰ Queued", value=f"<t:{int(action.created_at)}:R>", inline=True)
+    guild_id = action.payload.get("guild_id", home_guild_id())
+    log_dispatcher.submit(guild_channels(guild_id, "log_channel_id"), log_embed)
+
+pending_worker = PendingActionWorker(PendingQueue(PENDING_ACTIONS_DB), rcon_for, serves=serves_guild, handlers={
+    "whitelist_add": finish_queued_approval,
+    "ban": finish_queued_moderation,
+    "pardon": finish_queued_moderation,
+    "kick": finish_queued_moderation,
+    "whitelist_sync": finish_queued_moderation,
+}, dropped={
+    "whitelist_add": fail_queued_approval,
+})
+
 # --- TASKS ---
 
 @tasks.loop(seconds=10)
 async def change_status():
     await bot.change_presence(activity=next(bot_statuses))
 
-@tasks.loop(seconds=30)
-async def update_live_status():
-    if not os.path.exists(STATUS_FILE): return
+@tasks.loop(seconds=5)
+async def refresh_whitelist_mirror():
+    # Stat/parse in a worker thread; only the (cheap) index patch runs on the loop
+    try:
+        result = await asyncio.to_thread(whitelist_mirror.read)
+        if result: whitelist_mirror.apply(*result)
+    except Exception as e:
+        print(f"Whitelist Mirror Error: {e}")
+
+# Whitelist <-> role reconciliation
+reconcile_lock = asyncio.Lock()
+
+async def load_whitelisted_names(group, guild_id):
+    """Lowercase names on the server whitelist, from the mirror if loaded, else `whitelist list`.
+    None if the whitelist can't be read or doesn't look trustworthy."""
+    if group is rcon and whitelist_mirror is not None and whitelist_mirror.loaded:
+        names = {name.lower() for name in whitelist_mirror.names()}
+        if not names and app_store.iter_approved(limit=1, guild_id=guild_id):
+            print(f"Reconcile Error [{guild_id}]: whitelist file is empty but there are approved applications, skipped")
+            return None
+        return names
+    resp = await rcon_command("whitelist list", group)
+    if resp is None: return None
+    names = parse_whitelist_list(resp)
+    if names is None: print(f"Reconcile Error [{guild_id}]: unexpected `whitelist list` reply: {resp[:100]!r}")
+    return names
+
+async def run_reconcile(guild, prune_departed=False, progress=None):
+    """Runs (or resumes) a reconciliation. Returns the job, or None if the role, servers or whitelist are unavailable."""
+    role, group = whitelisted_role(guild), rcon_for(guild.id)
+    if role is None or group is None: return None
+    names = await load_whitelisted_names(group, guild.id)
+    if names is None: return None
+    # Without the gateway member cache, role.members is empty: page through the member list once instead
+    members = await fetch_all_members(guild) if MEMBER_CACHE_MODE == "lean" else None
+    job = ReconcileJob(guild, role, app_store, names, lambda cmd: rcon_command_all(cmd, group),
+                       state_path=RECONCILE_STATE_FILE.format(guild_id=guild.id),
+                       prune_departed=prune_departed, progress=progress, members=members)
+    await job.run()
+    if job.phase == "done": atomic_write(RECONCILE_LAST_RUN_FILE.format(guild_id=guild.id), json.dumps({"finished_at": time.time()}))
+    return job
+
+def reconcile_due(guild_id, now):
+    """True if a guild's last reconcile finished over RECONCILE_INTERVAL ago, or one was interrupted."""
+    if os.path.exists(RECONCILE_STATE_FILE.format(guild_id=guild_id)): return True
+    path = RECONCILE_LAST_RUN_FILE.format(guild_id=guild_id)
+    try:
+        with open(path, "r") as f: return now - json.load(f)["finished_at"] >= RECONCILE_INTERVAL
+    except (OSError, ValueError, KeyError):
+        # Never reconciled: start the clock rather than reconciling as soon as the bot starts
+        atomic_write(path, json.dumps({"finished_at": now}))
+        return False
+
+def reconcile_summary(job):
+    st = job.stats
+    return (f"**Phase:** `{job.phase}`{' (resumed)' if job.resumed else ''}\n"
+            f"🔎 Scanned: **{st.scanned}**\n"
+            f"➕ Roles added: **{st.roles_added}**\n"
+            f"➖ Roles removed: **{st.roles_removed}**\n"
+            f"🚪 Removed from whitelist: **{st.whitelist_removed}**\n"
+            f"❔ Role holders without an application: **{st.unmapped}**\n"
+            f"⚠️ Errors: **{st.errors}**")
+
+@tasks.loop(minutes=15)
+async def scheduled_reconcile():
+    # Due times are kept on disk, so restarts don't trigger a full reconcile of every guild.
+    # One guild at a time: each run already paces its own Discord and RCON calls
+    for cfg in guild_configs.all():
+        guild = bot.get_guild(cfg.guild_id)
+        if guild is None or not cfg.whitelisted_role_id or not cfg.has_rcon: continue
+        if not reconcile_due(guild.id, time.time()): continue
+        async with reconcile_lock:
+            try:
+                job = await run_reconcile(guild)
+                if job: print(f"Reconcile finished [{guild.id}]: {job.stats}")
+            except Exception as e:
+                print(f"Reconcile Error [{guild.id}]: {e}")
+
+# Metrics export
+metrics_server = None
+
+@tasks.loop(seconds=15)
+async def write_metrics_file():
+    try:
+        await asyncio.to_thread(metrics.write_textfile, METRICS_FILE, metrics.render_prometheus())
+    except Exception as e:
+        print(f"Metrics Error: {e}")
+
+async def start_metrics_export():
+    global metrics_server
+    loop_lag_sampler.start()
+    if METRICS_FILE and not write_metrics_file.is_running(): write_metrics_file.start()
+    if METRICS_PORT and metrics_server is None:
+        try:
+            metrics_server = await metrics.serve(port=METRICS_PORT)
+        except OSError as e:
+            # e.g. the port is taken by another process: the bot runs fine without the endpoint
+            return print(f"Metrics Error: could not serve on port {METRICS_PORT}: {e}")
+        print(f"Metrics served on http://127.0.0.1:{METRICS_PORT}/metrics")
+
+def load_status_config():
+    """The pre-guild-config live status location, if there was one."""
+    if not os.path.exists(STATUS_FILE): return None, None
     try:
         with open(STATUS_FILE, "r") as f: data = json.load(f)
-        cid, mid = data.get("channel_id"), data.get("message_id")
-        if not cid or not mid: return
-        
-        resp = rcon_command("list")
-        
-        # Defaults
-        online, max_p, players = "0", "0", "No players online."
-        is_online = False
-        
-        if resp:
-            is_online = True
-            # Regex to parse "There are 5 of 20 players online:..."
-            match = re.search(r'(\d+)\s*of\s*(\d+)', resp)
-            if match:
-                online, max_p = match.groups()
-            
-            if ":" in resp:
-                p_part = resp.split(":", 1)[1].strip()
-                if p_part: players = p_part.replace(", ", "\n")
-        
-        embed = discord.Embed(
-            title="🔴 LIVE SERVER STATUS" if is_online else "⚫ SERVER OFFLINE",
-            color=EMBED_COLORS["live"] if is_online else EMBED_COLORS["offline"],
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_thumbnail(url=SERVER_ICON_URL)
-        
-        if is_online:
-            embed.add_field(name="🟢 Status", value="**ONLINE**", inline=True)
-            embed.add_field(name="👥 Players", value=f"**{online} / {max_p}**", inline=True)
-            embed.add_field(name="📜 Online List", value=f"```{players}```", inline=False)
-        else:
-            embed.description = "**The server is currently offline or restarting.**"
+        return data.get("channel_id"), data.get("message_id")
+    except Exception as e:
+        print(f"Status Config Error: {e}")
+        return None, None
+
+def build_status_embed(state):
+    embed = discord.Embed(
+        title="🔴 LIVE SERVER STATUS" if state.is_online else "⚫ SERVER OFFLINE",
+        color=EMBED_COLORS["live"] if state.is_online else EMBED_COLORS["offline"],
+        timestamp=discord.utils.utcnow()
+    )
+    embed.set_thumbnail(url=SERVER_ICON_URL)
+    
+    if state.is_online:
+        players = "\n".join(state.players) or "No players online."
+        embed.add_field(name="🟢 Status", value="**ONLINE**", inline=True)
+        embed.add_field(name="👥 Players", value=f"**{state.online} / {state.max_players}**", inline=True)
+        embed.add_field(name="📜 Online List", value=f"```{players}```", inline=False)
+        if len(state.servers) > 1:
+            lines = [f"{'🟢' if up else '🔴'} **{name}** — {online}/{max_p}" if up else f"🔴 **{name}** — offline"
+                     for name, up, online, max_p in state.servers]
+            embed.add_field(name="🖧 Servers", value="\n".join(lines), inline=False)
+    else:
+        embed.description = "**The server is currently offline or restarting.**"
+    
+    embed.set_footer(text="Last changed")
+    return embed
+
+class LiveStatus:
+    """Holds one guild's status message handle and the last rendered state between polls."""
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.message = None
+        self.poller = AdaptivePoller()
+
+    def reset(self):
+        self.message = None
+        self.poller.reset()
+
+    def get_message(self):
+        # A PartialMessage can be edited directly, without the extra fetch_message request
+        cfg = guild_configs.get(self.guild_id)
+        if self.message is None and cfg and cfg.status_channel_id and cfg.status_message_id:
+            chan = bot.get_channel(cfg.status_channel_id)
+            if chan: self.message = chan.get_partial_message(cfg.status_message_id)
+        return self.message
+
+live_statuses = {}         # guild id -> LiveStatus
+guild_session_trackers = {}  # guild id -> SessionTracker
+group_polls = {}           # RconGroup -> (started_at, task) of its latest `list` poll
+STATUS_SHARE_WINDOW = 5    # seconds a poll result is reused by other guilds on the same servers
+
+def live_status_for(guild_id):
+    live = live_statuses.get(guild_id)
+    if live is None: live = live_statuses[guild_id] = LiveStatus(guild_id)
+    return live
+
+def tracker_for(guild_id):
+    """A guild's session tracker (None if it has no servers).
+
+    Every guild has its own, even when guilds share servers, so a tracker's
+    files are only ever written by the process serving its guild.
+    """
+    if rcon_for(guild_id) is None: return None
+    tracker = guild_session_trackers.get(guild_id)
+    if tracker is None:
+        # The home guild keeps the files it had before per-guild configs, at the top of SESSIONS_DIR
+        directory = SESSIONS_DIR if guild_id == home_guild_id() else os.path.join(SESSIONS_DIR, str(guild_id))
+        tracker = guild_session_trackers[guild_id] = SessionTracker(directory)
+    return tracker
+
+def track_sessions(guild_id, state):
+    """Feeds a poll into the guild's session tracker and fires `player_join` / `player_leave` bot events."""
+    tracker = tracker_for(guild_id)
+    if tracker is None: return
+    joined, left = tracker.observe(state.players)
+    for name in joined: bot.dispatch("player_join", guild_id, name)
+    for name in left: bot.dispatch("player_leave", guild_id, name)
+    if joined: metrics.inc("player_joins_total", len(joined))
+    if left: metrics.inc("player_leaves_total", len(left))
+
+async def poll_servers(group):
+    replies = await rcon_broadcast("list", group)
+    return merge_statuses({server: parse_list(resp) for server, resp in replies.items()})
+
+async def poll_group_status(guild_id):
+    """The merged `list` status of a guild's servers. Guilds sharing servers share one poll per window."""
+    group = rcon_for(guild_id)
+    if group is None: return OFFLINE
+    latest = group_polls.get(group)
+    if latest is None or time.monotonic() - latest[0] > STATUS_SHARE_WINDOW:
+        latest = group_polls[group] = (time.monotonic(), asyncio.ensure_future(poll_servers(group)))
+    return await asyncio.shield(latest[1])
+
+@tasks.loop(minutes=5)
+async def save_sessions():
+    # A few hundred KB of raw arrays per tracker; written on the loop so the arrays can't change mid-write
+    for tracker in guild_session_trackers.values():
+        try: tracker.save()
+        except Exception as e: print(f"Session Tracker Error: {e}")
+
+async def poll_guild_status(guild_id):
+    """One live status poll for a guild. Returns the seconds until its next poll."""
+    live = live_status_for(guild_id)
+    state = OFFLINE
+    try:
+        state = await poll_group_status(guild_id)
+        track_sessions(guild_id, state)
         
-        embed.set_footer(text="Updates every 30 seconds")
+        msg = live.get_message()
+        if not msg: return live.poller.slow
+        if not live.poller.observe(state):
+            metrics.inc("status_updates_total", result="unchanged")
+            return live.poller.next_interval(state)
+        metrics.inc("status_updates_total", result="edited")
         
-        chan = bot.get_channel(cid)
-        if chan:
-            msg = await chan.fetch_message(mid)
-            await msg.edit(embed=embed, view=ConnectView())
+        try:
+            await msg.edit(embed=build_status_embed(state))
+        except discord.NotFound:
+            print(f"Status Loop Error [{guild_id}]: status message was deleted.")
+            guild_configs.update(guild_id, status_channel_id=None, status_message_id=None)
+        except Exception:
+            live.poller.reset()  # retry the edit next cycle
+            raise
             
     except Exception as e:
-        print(f"Status Loop Error: {e}")
+        metrics.inc("status_loop_errors_total")
+        print(f"Status Loop Error [{guild_id}]: {e}")
+    return live.poller.next_interval(state)
+
+# One shared scheduler runs every guild's status loop at its own adaptive interval
+status_scheduler = StatusScheduler(poll_guild_status, concurrency=STATUS_CONCURRENCY)
+
+def schedule_guild(guild_id):
+    """Starts (or restarts) a guild's status loop if the bot is in the guild and it has servers."""
+    cfg = guild_configs.get(guild_id)
+    if cfg and cfg.has_rcon and bot.get_guild(guild_id) is not None: status_scheduler.schedule(guild_id)
+    else: status_scheduler.remove(guild_id)
+    metrics.set("status_guilds", len(status_scheduler))
+
+def on_guild_config_change(old, new):
+    if old is not None and (old.rcon_servers != new.rcon_servers or old.use_default_rcon != new.use_default_rcon):
+        group = rcon_groups.pop(new.guild_id, None)
+        if group is not None:
+            group_polls.pop(group, None)
+            asyncio.create_task(group.close())
+        tracker = guild_session_trackers.pop(new.guild_id, None)
+        if tracker is not None: tracker.save()
+    live = live_statuses.get(new.guild_id)
+    if live is not None: live.reset()
+    if bot.is_ready(): schedule_guild(new.guild_id)
+
+guild_configs.listeners.append(on_guild_config_change)
+
+async def wait_for_gateway():
+    await bot.wait_until_ready()
+
+# Loops started from setup_hook that need the gateway (presence, channel cache) wait for the first ready
+for discord_loop in (change_status, scheduled_reconcile): discord_loop.before_loop(wait_for_gateway)
+
+def import_legacy_config():
+    """Moves the module-level IDs and status_config.json into the config store for the guild they belong to (once)."""
+    guild_id = home_guild_id()
+    if guild_id is None: return
+    cfg = guild_configs.get(guild_id)
+    if cfg is not None:
+        # Imported before the connect address moved into the config
+        if cfg.server_address is None:
+            guild_configs.update(guild_id, server_address=SERVER_IP, java_port=int(SERVER_PORT_JAVA), bedrock_port=int(SERVER_PORT_BEDROCK))
+        return
+    status_channel_id, status_message_id = load_status_config()
+    guild_configs.update(guild_id, apply_channel_id=MC_WL_CHANNEL_ID, review_channel_id=REVIEW_CHANNEL_ID,
+                         approved_channel_id=APPROVED_CHANNEL_ID, rejected_channel_id=REJECTED_CHANNEL_ID,
+                         log_channel_id=LOG_CHANNEL_ID, whitelisted_role_id=MC_WHITELISTED_ROLE_ID, use_default_rcon=True,
+                         status_channel_id=status_channel_id, status_message_id=status_message_id,
+                         server_address=SERVER_IP, java_port=int(SERVER_PORT_JAVA), bedrock_port=int(SERVER_PORT_BEDROCK))
+    moved = app_store.assign_guild(guild_id)
+    print(f"Imported the legacy config into guild {guild_id} ({moved} application(s) moved).")
+
+def import_legacy_admins():
+    """Moves mc_admins.json into the home guild's admin list (once: the file is renamed afterwards)."""
+    guild_id = home_guild_id()
+    if guild_id is None or not os.path.exists(ADMIN_FILE): return
+    try:
+        with open(ADMIN_FILE, "r") as f: legacy_ids = {int(uid) for uid in json.load(f)}
+    except (OSError, ValueError, TypeError) as e:
+        return print(f"Admin Import Error: {e}")
+    cfg = guild_configs.get(guild_id)
+    guild_configs.update(guild_id, mc_admin_ids=(cfg.mc_admin_ids if cfg else frozenset()) | legacy_ids)
+    os.replace(ADMIN_FILE, ADMIN_FILE + ".imported")
+    print(f"Imported the legacy MC admins into guild {guild_id}.")
 
 # --- COMMANDS ---
 
+@bot.event
+async def setup_hook():
+    # Runs once per process, after login and before the gateway connects
+    with startup_timer.phase("views"):
+        # Register all persistent views
+        bot.add_view(WhitelistView())
+        bot.add_view(ReviewView())
+        bot.add_view(AdminPanelView())
+        bot.add_view(ConnectView())
+    
+    with startup_timer.phase("tasks"):
+        log_dispatcher.start()
+        await start_metrics_export()
+        change_status.start()
+        if whitelist_mirror is not None: refresh_whitelist_mirror.start()
+        scheduled_reconcile.start()
+        status_scheduler.start()
+        save_sessions.start()
+    
+    with startup_timer.phase("command_sync"):
+        try:
+            synced = await sync_if_changed(bot.tree, COMMAND_HASH_FILE, bot.application_id, force=FORCE_COMMAND_SYNC)
+            print("Slash commands synced." if synced else "Slash commands unchanged, sync skipped.")
+        except Exception as e:
+            print(f"Command Sync Error: {e}")
+    print(f"Startup: {startup_timer.summary()}")
+
 @bot.event
 async def on_ready():
-    print(f"Bot connected as {bot.user}")
-    # Register all persistent views
-    bot.add_view(WhitelistView())
-    bot.add_view(ReviewView())
-    bot.add_view(AdminPanelView())
-    bot.add_view(ConnectView())
-    
-    change_status.start()
-    update_live_status.start()
-    try: await bot.tree.sync()
-    except Exception as e: print(e)
-
-# 1. WHITELIST SETUP (Updated Text)
+    # Fires again after every gateway reconnect (but not on resumes), so keep it cheap and idempotent
+    metrics.inc("gateway_ready_total")
+    import_legacy_config()
+    import_legacy_admins()
+    for guild in bot.guilds:
+        if guild.id not in status_scheduler: schedule_guild(guild.id)
+    pending_worker.start()  # no-op once running; queued handlers need the channel cache, so not before ready
+    seconds = startup_timer.mark("ready")
+    if seconds is not None:
+        requeue_unposted()  # held applications need the review channels, so only once they are cached
+        print(f"Bot connected as {bot.user} ({seconds:.1f}s after launch)")
+    else: print(f"Bot reconnected as {bot.user}")
+
+@bot.event
+async def on_resumed():
+    metrics.inc("gateway_resumed_total")
+
+@bot.event
+async def on_guild_join(guild):
+    schedule_guild(guild.id)
+
+@bot.event
+async def on_guild_remove(guild):
+    status_scheduler.remove(guild.id)
+
+# 1. WHITELIST SETUP (Bot Dev or Manage Server)
 @bot.tree.command(name="setup", description="Create whitelist embed")
 async def setup(interaction: discord.Interaction):
-    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
     
     embed = discord.Embed(
         title="Server Whitelist Application",
@@ -401,44 +1057,388 @@ async def setup(interaction: discord.Interaction):
     embed.set_thumbnail(url=SERVER_ICON_URL)
     embed.set_footer(text=f"Welcome to {interaction.guild.name}!", icon_url=SERVER_ICON_URL)
     
-    chan = bot.get_channel(MC_WL_CHANNEL_ID)
+    cfg = guild_configs.get(interaction.guild_id)
+    chan = bot.get_channel(cfg.apply_channel_id) if cfg and cfg.apply_channel_id else None
+    if chan is None:
+        # No apply channel yet: use this one
+        chan = interaction.channel
+        guild_configs.update(interaction.guild_id, apply_channel_id=chan.id)
     await chan.send(embed=embed, view=WhitelistView())
     await interaction.response.send_message(f"✅ Setup Complete in {chan.mention}", ephemeral=True)
 
-# 2. ADD MC ADMIN (Bot Dev Only)
+# 2. ADD MC ADMIN (Bot Dev, or Manage Server for guilds with their own servers)
+def guild_admin_ids(guild_id):
+    cfg = guild_configs.get(guild_id)
+    return sorted(cfg.mc_admin_ids) if cfg else []
+
 @bot.tree.command(name="add_mc_admin", description="Add user to Admin Panel access")
 async def add_mc_admin(interaction: discord.Interaction, user: discord.User):
-    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    if not can_manage_admins(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
     
-    admins = load_admins()
-    if user.id not in admins:
-        admins.append(user.id)
-        save_admins(admins)
+    admin_ids = guild_admin_ids(interaction.guild_id)
+    if user.id not in admin_ids:
+        guild_configs.update(interaction.guild_id, mc_admin_ids=[*admin_ids, user.id])
         await interaction.response.send_message(f"✅ {user.mention} added to Admin Panel.", ephemeral=True)
     else:
         await interaction.response.send_message("⚠️ Already an admin.", ephemeral=True)
 
-# 3. ADMIN PANEL CHANNEL (Bot Dev Only)
+# 2b. REMOVE MC ADMIN (Bot Dev, or Manage Server for guilds with their own servers)
+@bot.tree.command(name="remove_mc_admin", description="Remove user from Admin Panel access")
+async def remove_mc_admin(interaction: discord.Interaction, user: discord.User):
+    if not can_manage_admins(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    
+    admin_ids = guild_admin_ids(interaction.guild_id)
+    if user.id in admin_ids:
+        guild_configs.update(interaction.guild_id, mc_admin_ids=[uid for uid in admin_ids if uid != user.id])
+        await interaction.response.send_message(f"✅ {user.mention} removed from Admin Panel.", ephemeral=True)
+    else:
+        await interaction.response.send_message("⚠️ Not an admin.", ephemeral=True)
+
+# 2c. LIST MC ADMINS (Bot Dev or Manage Server)
+@bot.tree.command(name="list_mc_admins", description="List users with Admin Panel access")
+async def list_mc_admins(interaction: discord.Interaction):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    
+    admin_ids = guild_admin_ids(interaction.guild_id)
+    desc = "\n".join(f"• <@{uid}> (`{uid}`)" for uid in admin_ids) or "No MC admins configured."
+    embed = discord.Embed(title="🛡️ MC Admins", description=desc, color=EMBED_COLORS["admin"])
+    embed.set_footer(text=f"{len(admin_ids)} admin(s)")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# 3. ADMIN PANEL CHANNEL (Bot Dev, or Manage Server for guilds with their own servers)
 @bot.tree.command(name="setup_admin_panel", description="Create Admin Buttons (Ban/Kick/Say)")
 async def setup_admin(interaction: discord.Interaction):
-    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    if not can_manage_admins(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
     
     embed = discord.Embed(title="🛡️ MC Admin Control", description="Manage the server via RCON.", color=EMBED_COLORS["admin"])
     await interaction.channel.send(embed=embed, view=AdminPanelView())
     await interaction.response.send_message("✅ Admin Panel Created", ephemeral=True)
 
-# 4. LIVE STATUS CHANNEL (Bot Dev Only)
+# 4. APPLICATION HISTORY (MC Admins)
+@bot.tree.command(name="applications", description="Browse whitelist application history")
+@app_commands.describe(user="Filter by applicant", mc_username="Filter by Minecraft username", status="Filter by status", page="Page number")
+@app_commands.choices(status=[app_commands.Choice(name=s.title(), value=s) for s in (PENDING, QUEUED, APPROVED, REJECTED)])
+async def applications(interaction: discord.Interaction, user: discord.User = None, mc_username: str = None,
+                       status: app_commands.Choice[str] = None, page: app_commands.Range[int, 1] = 1):
+    if not is_mc_admin(interaction.user.id, interaction.guild_id): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+
+    per_page = 10
+    apps, total = app_store.history(user_id=user.id if user else None, mc_username=mc_username,
+                                    status=status.value if status else None, page=page - 1, per_page=per_page,
+                                    guild_id=interaction.guild_id)
+    pages = max(1, -(-total // per_page))
+    icons = {PENDING: "⏳", QUEUED: "🕒", APPROVED: "✅", REJECTED: "❌"}
+    lines = [f"{icons.get(a.status, '•')} `#{a.id}` <@{a.user_id}> → `{a.final_username or a.mc_username}` ({a.edition}) <t:{int(a.created_at)}:R>"
+             for a in apps]
+    embed = discord.Embed(title="📚 Application History", description="\n".join(lines) or "No applications found.", color=EMBED_COLORS["admin"])
+    embed.set_footer(text=f"Page {min(page, pages)}/{pages} • {total} result(s)")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# 5. WHITELIST LOOKUP (MC Admins)
+@bot.tree.command(name="whitelist_lookup", description="Check whether a player is whitelisted (works while the server is down)")
+@app_commands.describe(name="Minecraft username or UUID")
+async def whitelist_lookup(interaction: discord.Interaction, name: str):
+    if not is_mc_admin(interaction.user.id, interaction.guild_id): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    if rcon_for(interaction.guild_id) is not rcon or whitelist_mirror is None or not whitelist_mirror.loaded:
+        return await interaction.response.send_message("⚠️ The whitelist file is not available (check `WHITELIST_PATH`).", ephemeral=True)
+    
+    entry = whitelist_mirror.lookup_name(name) or whitelist_mirror.lookup_uuid(name)
+    if entry:
+        await interaction.response.send_message(f"✅ `{entry['name']}` is whitelisted (UUID `{entry['uuid'] or 'unknown'}`).", ephemeral=True)
+    else:
+        await interaction.response.send_message(f"❌ `{name}` is not on the whitelist ({len(whitelist_mirror)} players listed).", ephemeral=True)
+
+# 6. WHITELIST RECONCILIATION (Bot Dev Only)
+@bot.tree.command(name="reconcile_whitelist", description="Sync the whitelisted role with the server whitelist")
+@app_commands.describe(prune_departed="Also remove approved players who left the Discord from the whitelist",
+                       restart="Discard an interrupted run instead of resuming it")
+async def reconcile_whitelist(interaction: discord.Interaction, prune_departed: bool = False, restart: bool = False):
+    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    if reconcile_lock.locked(): return await interaction.response.send_message("⏳ A reconciliation is already running.", ephemeral=True)
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    last_edit = 0.0
+    
+    async def progress(job):
+        nonlocal last_edit
+        if job.phase != "done" and time.monotonic() - last_edit < 2: return
+        last_edit = time.monotonic()
+        embed = discord.Embed(title="🔄 Whitelist Reconciliation", description=reconcile_summary(job), color=EMBED_COLORS["admin"])
+        try: await interaction.edit_original_response(embed=embed)
+        except discord.HTTPException: pass
+    
+    async with reconcile_lock:
+        if restart: ReconcileJob.discard_state(RECONCILE_STATE_FILE.format(guild_id=interaction.guild_id))
+        job = await run_reconcile(interaction.guild, prune_departed=prune_departed, progress=progress)
+    if job is None:
+        await interaction.edit_original_response(content="❌ Could not read the whitelist (RCON down and no whitelist file), or the role or RCON servers are not configured.")
+
+# 7. RCON SERVER HEALTH (MC Admins)
+@bot.tree.command(name="server_health", description="Show RCON health for every configured server")
+async def server_health(interaction: discord.Interaction):
+    if not is_mc_admin(interaction.user.id, interaction.guild_id): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    
+    group = rcon_for(interaction.guild_id)
+    if group is None: return await interaction.response.send_message(NO_RCON, ephemeral=True)
+    embed = discord.Embed(title="🖧 RCON Server Health", color=EMBED_COLORS["admin"])
+    for name, health in group.health.items():
+        latency = f"{health.last_latency * 1000:.0f} ms" if health.last_latency is not None else "n/a"
+        if health.ok:
+            value = f"🟢 OK • last reply {latency}"
+        elif group is rcon:
+            value = f"🔴 {health.consecutive_failures} failure(s) in a row\n`{(health.last_error or '')[:200]}`"
+        else:
+            # Raw socket errors would tell a guild's managers what sits behind a host they entered
+            value = f"🔴 {health.consecutive_failures} failure(s) in a row"
+        if health.last_ok_at: value += f"\nLast OK <t:{int(health.last_ok_at)}:R>"
+        embed.add_field(name=f"{name}{' (primary)' if name == group.primary else ''}", value=value, inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# 8. BOT METRICS (Bot Dev Only)
+def histogram_lines(name, label, limit=8):
+    """One line per label value: count, mean and p99 in ms, plus the error count, busiest first."""
+    merged = {}
+    for key, hist in metrics.histograms.get(name, {}).items():
+        value = dict(key).get(label, "-")
+        count, total, p99 = merged.get(value, (0, 0.0, 0.0))
+        merged[value] = (count + hist.count, total + hist.sum, max(p99, hist.quantile(0.99)))
+    errors = {}
+    for key, n in metrics.counters.get(f"{name.removesuffix('_seconds')}_errors_total", {}).items():
+        errors[dict(key).get(label, "-")] = errors.get(dict(key).get(label, "-"), 0) + n
+    ranked = sorted(merged.items(), key=lambda item: -item[1][0])[:limit]
+    lines = [f"`{value}` ×{count} • avg {total / count * 1000:.0f} ms • p99 ≤{p99 * 1000:.0f} ms"
+             + (f" • ⚠️ {errors[value]}" if errors.get(value) else "")
+             for value, (count, total, p99) in ranked if count]
+    return "\n".join(lines)[:1024] or "No data yet."
+
+@bot.tree.command(name="bot_metrics", description="Show latency and error metrics")
+async def bot_metrics(interaction: discord.Interaction):
+    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    
+    lag = metrics.histograms.get("event_loop_lag_seconds", {}).get((), None)
+    rcon_errors = sum(n for key, n in metrics.counters.get("rcon_commands_total", {}).items() if dict(key)["result"] != "ok")
+    embed = discord.Embed(title="📈 Bot Metrics", color=EMBED_COLORS["admin"], timestamp=discord.utils.utcnow())
+    embed.description = f"⏱️ Up since <t:{int(metrics.started_at)}:R> • RCON errors: **{rcon_errors}**"
+    if lag and lag.count:
+        embed.description += f"\n🌀 Loop lag p50 ≤{lag.quantile(0.5) * 1000:.0f} ms • p99 ≤{lag.quantile(0.99) * 1000:.0f} ms • max {lag.max * 1000:.0f} ms"
+    embed.add_field(name="🖥️ RCON Commands", value=histogram_lines("rcon_command_seconds", "command"), inline=False)
+    embed.add_field(name="🌐 Discord REST", value=histogram_lines("discord_rest_seconds", "route"), inline=False)
+    embed.add_field(name="🖱️ Interaction Handlers", value=histogram_lines("interaction_handler_seconds", "handler"), inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# 9. LIVE STATUS CHANNEL (Bot Dev or Manage Server)
 @bot.tree.command(name="setup_status", description="Create Live Status Embed")
 async def setup_status(interaction: discord.Interaction):
-    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
     
     embed = discord.Embed(title="🔴 LIVE STATUS", description="Initializing...", color=EMBED_COLORS["live"])
     msg = await interaction.channel.send(embed=embed, view=ConnectView())
     
-    with open(STATUS_FILE, "w") as f:
-        json.dump({"channel_id": interaction.channel_id, "message_id": msg.id}, f)
+    guild_configs.update(interaction.guild_id, status_channel_id=interaction.channel_id, status_message_id=msg.id)
         
     await interaction.response.send_message("✅ Live Status Created", ephemeral=True)
 
-bot.run(TOKEN)
+# 10. PLAYER STATS (Everyone, answered from the session tracker without touching RCON)
+def format_duration(seconds):
+    minutes = int(seconds) // 60
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days: return f"{days}d {hours}h {minutes}m"
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+@bot.tree.command(name="peak_today", description="Show today's peak online player count (UTC day)")
+async def peak_today(interaction: discord.Interaction):
+    tracker = tracker_for(interaction.guild_id)
+    if tracker is None: return await interaction.response.send_message(NO_RCON, ephemeral=True)
+    peak, at = tracker.peak_today()
+    if at is None: return await interaction.response.send_message("📉 No status polls recorded today yet.", ephemeral=True)
+    await interaction.response.send_message(f"📈 Peak today: **{peak}** player(s) online at <t:{at}:t>.", ephemeral=True)
+
+@bot.tree.command(name="playtime", description="Show how long a player has played")
+@app_commands.describe(name="Minecraft username")
+async def playtime(interaction: discord.Interaction, name: str):
+    tracker = tracker_for(interaction.guild_id)
+    if tracker is None: return await interaction.response.send_message(NO_RCON, ephemeral=True)
+    total = tracker.playtime_of(name)
+    if total is None: return await interaction.response.send_message(f"❓ `{name}` has never been seen online.", ephemeral=True)
+    await interaction.response.send_message(f"⏱️ `{name}` has played for **{format_duration(total)}**.", ephemeral=True)
+
+@bot.tree.command(name="last_seen", description="Show when a player was last online")
+@app_commands.describe(name="Minecraft username")
+async def last_seen(interaction: discord.Interaction, name: str):
+    tracker = tracker_for(interaction.guild_id)
+    if tracker is None: return await interaction.response.send_message(NO_RCON, ephemeral=True)
+    seen = tracker.last_seen_of(name)
+    if seen is None: return await interaction.response.send_message(f"❓ `{name}` has never been seen online.", ephemeral=True)
+    display, at, online = seen
+    if online: return await interaction.response.send_message(f"🟢 `{display}` is online right now.", ephemeral=True)
+    await interaction.response.send_message(f"👀 `{display}` was last seen <t:{at}:R>.", ephemeral=True)
+
+# 11. BULK MODERATION (MC Admins)
+BULK_MAX_BYTES = 256 * 1024
+BULK_ICONS = {"ok": "✅", "unchanged": "➖", "failed": "❌", "unreachable": "🔌"}
+
+@bot.tree.command(name="bulk_moderate", description="Ban, unban or kick players from an uploaded CSV / text list")
+@app_commands.describe(file="One player per line: username[,action[,reason]]",
+                       default_action="Action for rows that don't name one",
+                       reason="Reason for rows that don't give one")
+@app_commands.choices(default_action=[app_commands.Choice(name=a.title(), value=a) for a in ("ban", "unban", "kick")])
+async def bulk_moderate(interaction: discord.Interaction, file: discord.Attachment, default_action: str = "ban", reason: str = ""):
+    if not is_mc_admin(interaction.user.id, interaction.guild_id): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    if file.size > BULK_MAX_BYTES: return await interaction.response.send_message(f"❌ File too large (max {BULK_MAX_BYTES // 1024} KB).", ephemeral=True)
+    group = rcon_for(interaction.guild_id)
+    if group is None: return await interaction.response.send_message(NO_RCON, ephemeral=True)
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return await interaction.edit_original_response(content="❌ The file is not UTF-8 text.")
+    rows, problems = parse_bulk_rows(text, default_action, reason)
+    if not rows:
+        lines = "\n".join(f"Line {line}: {message}" for line, message in problems[:10])
+        return await interaction.edit_original_response(content=f"❌ No valid rows found.\n{lines}"[:2000])
+    
+    last_edit = 0.0
+    
+    async def progress(done, total):
+        nonlocal last_edit
+        if done != total and time.monotonic() - last_edit < 2: return
+        last_edit = time.monotonic()
+        try: await interaction.edit_original_response(content=f"🔨 Running bulk moderation… **{done} / {total}** rows")
+        except discord.HTTPException: pass
+    
+    # Its own connections: the shared pools are too small to run BULK_CONCURRENCY rows at once, and stay free for everyone else
+    bulk_group = group.resized(BULK_CONCURRENCY)
+    try:
+        results = await run_bulk(rows, bulk_group, concurrency=BULK_CONCURRENCY, progress=progress)
+    finally:
+        await bulk_group.close()
+    counts = tally(results)
+    summary = " • ".join(f"{BULK_ICONS[k]} {k}: **{counts[k]}**" for k in BULK_ICONS if counts.get(k))
+    if problems: summary += f" • ⚠️ skipped rows: **{len(problems)}**"
+    
+    embed = discord.Embed(title="🔨 Bulk Moderation Finished", description=summary, color=EMBED_COLORS["admin"], timestamp=discord.utils.utcnow())
+    embed.add_field(name="📄 File", value=f"`{file.filename}` • {len(rows)} row(s) on {len(group.names)} server(s)", inline=False)
+    if counts.get("unreachable"): embed.add_field(name="🔌 Unreachable", value="Re-upload the `unreachable` rows from the result file once the server is back.", inline=False)
+    result_file = discord.File(io.BytesIO(render_results_csv(results, problems)), filename="bulk_moderate_results.csv")
+    await interaction.edit_original_response(content=None, embed=embed, attachments=[result_file])
+    
+    log_embed = embed.copy()
+    log_embed.add_field(name="👮 Run By", value=interaction.user.mention, inline=True)
+    log_dispatcher.submit(guild_channels(interaction.guild_id, "log_channel_id"), log_embed)
+
+# 12. GUILD CONFIGURATION (Bot Dev or Manage Server)
+def describe_config(cfg):
+    def mention(cid, kind="#"): return f"<{kind}{cid}>" if cid else "*not set*"
+    lines = [f"**{field.removesuffix('_channel_id').title()} channel:** {mention(getattr(cfg, field))}" for field in CHANNEL_FIELDS]
+    lines.append(f"**Whitelisted role:** {mention(cfg.whitelisted_role_id, '@&')}")
+    lines.append(f"**MC admins:** {len(cfg.mc_admin_ids)} (see `/list_mc_admins`)")
+    if cfg.server_address:
+        lines.append(f"**Connect address:** `{cfg.server_address}` (Java {cfg.java_port or 25565}, Bedrock {cfg.bedrock_port or 19132})")
+    else:
+        lines.append("**Connect address:** *not set*")
+    if cfg.use_default_rcon:
+        lines.append(f"**RCON:** default servers ({', '.join(rcon.names)})")
+    elif cfg.rcon_servers:
+        lines.append("**RCON:** " + ", ".join(f"`{srv['name']}` ({srv['host']}:{srv['port']})" for srv in cfg.rcon_servers))
+    else:
+        lines.append("**RCON:** *not set*")
+    status = f"https://discord.com/channels/{cfg.guild_id}/{cfg.status_channel_id}/{cfg.status_message_id}" if cfg.status_message_id else "*not set*"
+    lines.append(f"**Live status:** {status}")
+    return "\n".join(lines)
+
+@bot.tree.command(name="config_show", description="Show this server's whitelist bot configuration")
+async def config_show(interaction: discord.Interaction):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    cfg = guild_configs.get(interaction.guild_id)
+    desc = describe_config(cfg) if cfg else "Nothing configured yet. Start with `/config_channels`."
+    await interaction.response.send_message(embed=discord.Embed(title="⚙️ Server Configuration", description=desc, color=EMBED_COLORS["admin"]), ephemeral=True)
+
+@bot.tree.command(name="config_channels", description="Set the channels used for applications and logs")
+@app_commands.describe(apply="Where the apply button is posted", review="Where applications are reviewed",
+                       approved="Approval logs", rejected="Rejection logs", log="General logs")
+async def config_channels(interaction: discord.Interaction, apply: discord.TextChannel = None, review: discord.TextChannel = None,
+                          approved: discord.TextChannel = None, rejected: discord.TextChannel = None, log: discord.TextChannel = None):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    changes = {f"{name}_channel_id": chan.id for name, chan in
+               (("apply", apply), ("review", review), ("approved", approved), ("rejected", rejected), ("log", log)) if chan}
+    if not changes: return await interaction.response.send_message("⚠️ Pick at least one channel.", ephemeral=True)
+    cfg = guild_configs.update(interaction.guild_id, **changes)
+    await interaction.response.send_message(f"✅ Channels updated.\n{describe_config(cfg)}", ephemeral=True)
+
+@bot.tree.command(name="config_role", description="Set the role granted to whitelisted players")
+async def config_role(interaction: discord.Interaction, role: discord.Role):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    guild_configs.update(interaction.guild_id, whitelisted_role_id=role.id)
+    await interaction.response.send_message(f"✅ Whitelisted role set to {role.mention}.", ephemeral=True)
+
+@bot.tree.command(name="config_connect", description="Set the address shown by the live status Connect buttons")
+@app_commands.describe(address="Hostname or IP players connect to", java_port="Java Edition port", bedrock_port="Bedrock Edition port")
+async def config_connect(interaction: discord.Interaction, address: app_commands.Range[str, 1, 253],
+                         java_port: app_commands.Range[int, 1, 65535] = 25565, bedrock_port: app_commands.Range[int, 1, 65535] = 19132):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    address = address.strip().strip("`")
+    guild_configs.update(interaction.guild_id, server_address=address, java_port=java_port, bedrock_port=bedrock_port)
+    await interaction.response.send_message(f"✅ Connect address set to `{address}` (Java {java_port}, Bedrock {bedrock_port}).", ephemeral=True)
+
+async def public_address(host, port):
+    """An address `host` resolves to, or None unless it resolves only to publicly routable ones
+    (no loopback, private or link-local targets)."""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        return None
+    for info in infos:
+        addr = ipaddress.ip_address(info[4][0].split("%")[0])
+        if addr.version == 6 and addr.ipv4_mapped: addr = addr.ipv4_mapped
+        if not addr.is_global: return None
+    return infos[0][4][0] if infos else None
+
+@bot.tree.command(name="config_rcon_add", description="Add (or replace) an RCON server for this Discord server")
+@app_commands.describe(name="Short name, e.g. survival", host="Hostname or IP", port="RCON port", password="RCON password")
+async def config_rcon_add(interaction: discord.Interaction, name: str, host: str, password: str, port: app_commands.Range[int, 1, 65535] = 25575):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    
+    host = host.strip()
+    # Otherwise any server manager could make the bot probe its own host and network. The bot dev may use LAN servers.
+    trusted = is_bot_dev(interaction.user.id)
+    if not trusted and await public_address(host, port) is None:
+        return await interaction.followup.send("❌ The host must resolve to a public address.", ephemeral=True)
+    
+    server = {"name": name, "host": host, "port": port, "password": password}
+    if trusted: server["trusted"] = True  # skips the public address check on every connect
+    probe = RconGroup.from_config([server], size=1, timeout=RCON_TIMEOUT, resolve=public_address)
+    try:
+        await probe.command("list")
+        check = "🟢 Connected and authenticated."
+    except RconError:
+        # No error details: they would tell a port scanner which ports are open
+        check = "🔴 Could not connect or log in yet (saved anyway). Check the host, port, password and that RCON is enabled."
+    finally:
+        await probe.close()
+    
+    cfg = guild_configs.get(interaction.guild_id)
+    servers = [srv for srv in (cfg.rcon_servers or ()) if srv["name"] != name] if cfg else []
+    guild_configs.update(interaction.guild_id, rcon_servers=[*servers, server], use_default_rcon=False)
+    await interaction.followup.send(f"✅ RCON server `{name}` saved.\n{check}", ephemeral=True)
+
+@bot.tree.command(name="config_rcon_remove", description="Remove an RCON server from this Discord server")
+async def config_rcon_remove(interaction: discord.Interaction, name: str):
+    if not can_configure(interaction): return await interaction.response.send_message("❌ **Access Denied.**", ephemeral=True)
+    cfg = guild_configs.get(interaction.guild_id)
+    servers = [srv for srv in ((cfg.rcon_servers or ()) if cfg else ()) if srv["name"] != name]
+    if not cfg or len(servers) == len(cfg.rcon_servers or ()):
+        return await interaction.response.send_message(f"⚠️ No RCON server named `{name}`.", ephemeral=True)
+    guild_configs.update(interaction.guild_id, rcon_servers=servers or None)
+    await interaction.response.send_message(f"✅ RCON server `{name}` removed.", ephemeral=True)
+
+@bot.tree.command(name="config_rcon_default", description="Let this Discord server use the bot's default RCON servers")
+async def config_rcon_default(interaction: discord.Interaction, enabled: bool):
+    if not is_bot_dev(interaction.user.id): return await interaction.response.send_message("❌ Bot Dev Only.", ephemeral=True)
+    guild_configs.update(interaction.guild_id, use_default_rcon=enabled)
+    await interaction.response.send_message(f"✅ Default RCON servers {'enabled' if enabled else 'disabled'} for this server.", ephemeral=True)
 
+if __name__ == "__main__":
+    bot.run(TOKEN)
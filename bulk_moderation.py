@@ -0,0 +1,149 @@
+"""Bulk ban / pardon / kick from an uploaded list.
+
+Rows are `username[,action[,reason]]`, one per line, as CSV or whitespace
+separated text. They are validated and deduplicated up front, then streamed to
+every RCON server with a bounded number of commands in flight. Each command
+takes two round trips (the command, then the sentinel that marks the end of
+its reply) on a connection of its own, so with `concurrency` connections per
+server a list of N rows costs about 2·N / concurrency round trips instead of 2·N.
+"""
+import asyncio
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+
+ACTIONS = {"ban": "ban", "unban": "pardon", "pardon": "pardon", "kick": "kick"}
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_.]{1,17}$")  # Java names, plus the Bedrock "1" / "." prefixes
+HEADER_NAMES = ("username", "name", "player", "user")
+MAX_ROWS = 1000
+MAX_REASON = 200
+
+# Prefixes of Minecraft replies that mean the command did not do anything (matched
+# on the start only, since successful ban/kick replies echo the free-text reason)
+UNCHANGED_PREFIXES = ("nothing changed",)
+FAILED_PREFIXES = ("no player was found", "unknown or incomplete command", "incorrect argument",
+                   "that player does not exist", "expected ", "invalid ")
+
+
+@dataclass
+class BulkRow:
+    line: int
+    username: str
+    action: str  # "ban", "pardon" or "kick"
+    reason: str = ""
+
+    @property
+    def command(self) -> str:
+        if self.action == "pardon" or not self.reason: return f"{self.action} {self.username}"
+        return f"{self.action} {self.username} {self.reason}"
+
+
+@dataclass
+class BulkResult:
+    row: BulkRow
+    replies: dict = field(default_factory=dict)  # server -> console reply, or None if unreachable
+
+    @property
+    def outcomes(self) -> dict:
+        return {server: classify_reply(reply) for server, reply in self.replies.items()}
+
+
+def classify_reply(reply):
+    """Maps a console reply to "ok", "unchanged", "failed" or "unreachable"."""
+    if reply is None: return "unreachable"
+    lowered = reply.lstrip().lower()
+    if lowered.startswith(UNCHANGED_PREFIXES): return "unchanged"
+    if lowered.startswith(FAILED_PREFIXES): return "failed"
+    return "ok"
+
+
+def _split_line(cells):
+    # A plain text line such as "Griefer1 ban spawn griefing" is not CSV: split it on whitespace
+    if len(cells) == 1 and " " in cells[0].strip(): return cells[0].split(None, 2)
+    # Unquoted commas in the reason column spill into extra cells
+    return cells[:2] + [",".join(cells[2:])] if len(cells) > 3 else cells
+
+
+def parse_bulk_rows(text: str, default_action: str = "ban", default_reason: str = ""):
+    """Validates and deduplicates an uploaded list.
+
+    Returns (rows, problems) where problems is a list of (line number, message).
+    A player listed twice with the same action is kept once; a player listed
+    with conflicting actions keeps the first one.
+    """
+    rows, problems, seen = [], [], {}
+    for line, cells in enumerate(csv.reader(io.StringIO(text)), start=1):
+        cells = [c.strip() for c in _split_line(cells)]
+        if not cells or not cells[0] or cells[0].startswith("#"): continue
+        if line == 1 and cells[0].lower() in HEADER_NAMES: continue
+
+        username = cells[0]
+        action_name = (cells[1] if len(cells) > 1 and cells[1] else default_action).lower()
+        reason = cells[2] if len(cells) > 2 and cells[2] else default_reason
+        reason = " ".join(reason.split())[:MAX_REASON]  # commands are single-line
+
+        if not USERNAME_RE.match(username):
+            problems.append((line, f"invalid username `{username[:32]}`"))
+            continue
+        action = ACTIONS.get(action_name)
+        if action is None:
+            problems.append((line, f"unknown action `{action_name[:16]}` (use ban, unban or kick)"))
+            continue
+        previous = seen.get(username.lower())
+        if previous is not None:
+            if previous.action == action: problems.append((line, f"duplicate of line {previous.line}"))
+            else: problems.append((line, f"conflicts with line {previous.line} ({previous.action}), skipped"))
+            continue
+        if len(rows) >= MAX_ROWS:
+            problems.append((line, f"over the {MAX_ROWS} row limit, skipped"))
+            continue
+        row = BulkRow(line, username, action, reason)
+        seen[username.lower()] = row
+        rows.append(row)
+    return rows, problems
+
+
+async def run_bulk(rows, group, concurrency: int = 8, timeout: float = None, progress=None):
+    """Runs every row on every server of an RconGroup, at most `concurrency` rows at a time.
+
+    Rows beyond the group's pool size just wait for a connection, so give it
+    one sized to `concurrency` (see RconGroup.resized).
+    `progress`, if given, is awaited as `progress(done, total)` after each row.
+    Returns the BulkResults in row order.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    results = [BulkResult(row) for row in rows]
+    done = 0
+
+    async def run_row(result):
+        nonlocal done
+        async with sem:
+            replies = await group.broadcast(result.row.command, timeout)
+        result.replies = {server: None if isinstance(reply, Exception) else reply for server, reply in replies.items()}
+        done += 1
+        if progress: await progress(done, len(rows))
+
+    await asyncio.gather(*(run_row(result) for result in results))
+    return results
+
+
+def tally(results) -> dict:
+    """Counts outcomes over every (row, server) pair."""
+    counts = {}
+    for result in results:
+        for outcome in result.outcomes.values(): counts[outcome] = counts.get(outcome, 0) + 1
+    return counts
+
+
+def render_results_csv(results, problems=()) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["line", "username", "action", "reason", "server", "outcome", "console"])
+    for result in results:
+        row = result.row
+        for server, reply in result.replies.items():
+            writer.writerow([row.line, row.username, row.action, row.reason, server, classify_reply(reply), reply or ""])
+    for line, message in problems:
+        writer.writerow([line, "", "", "", "", "skipped", message])
+    return out.getvalue().encode("utf-8")
@@ -0,0 +1,110 @@
+"""Per-guild settings: channels, whitelisted role, RCON servers and the live status message.
+
+One SQLite row per guild holds the settings as JSON. All rows are loaded into a
+dict keyed by guild ID at startup and written through on every change, so the
+lookups on the interaction hot path never touch the database.
+"""
+import dataclasses
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+CHANNEL_FIELDS = ("apply_channel_id", "review_channel_id", "approved_channel_id", "rejected_channel_id", "log_channel_id")
+
+
+@dataclass(frozen=True)
+class GuildConfig:
+    guild_id: int
+    apply_channel_id: Optional[int] = None
+    review_channel_id: Optional[int] = None
+    approved_channel_id: Optional[int] = None
+    rejected_channel_id: Optional[int] = None
+    log_channel_id: Optional[int] = None
+    whitelisted_role_id: Optional[int] = None
+    mc_admin_ids: frozenset = frozenset()  # users allowed to run RCON moderation for this guild
+    rcon_servers: Optional[tuple] = None   # ({"name", "host", "port", "password"}, ...)
+    use_default_rcon: bool = False         # use the process-wide servers instead (granted by the bot dev only)
+    server_address: Optional[str] = None   # shown by the live status "Connect" buttons
+    java_port: Optional[int] = None
+    bedrock_port: Optional[int] = None
+    status_channel_id: Optional[int] = None
+    status_message_id: Optional[int] = None
+    updated_at: float = 0.0
+
+    @property
+    def has_rcon(self) -> bool:
+        return self.use_default_rcon or bool(self.rcon_servers)
+
+    def to_json(self) -> str:
+        data = dataclasses.asdict(self)
+        for key in ("guild_id", "updated_at"): data.pop(key)
+        for key in SET_FIELDS: data[key] = sorted(data[key])
+        return json.dumps(data)
+
+
+FIELDS = {f.name for f in dataclasses.fields(GuildConfig)} - {"guild_id", "updated_at"}
+TUPLE_FIELDS = ("rcon_servers",)  # stored as JSON lists, kept as tuples so configs stay hashable
+SET_FIELDS = ("mc_admin_ids",)    # stored as sorted JSON lists, kept as frozensets for membership checks
+
+
+def _from_row(guild_id: int, data: str, updated_at: float) -> GuildConfig:
+    values = {k: v for k, v in json.loads(data).items() if k in FIELDS}
+    for key in TUPLE_FIELDS:
+        if values.get(key) is not None: values[key] = tuple(values[key])
+    for key in SET_FIELDS:
+        if values.get(key) is not None: values[key] = frozenset(values[key])
+    return GuildConfig(guild_id=guild_id, updated_at=updated_at, **values)
+
+
+class GuildConfigStore:
+    """`listeners` are called as `listener(old config or None, new config)` after every change."""
+
+    def __init__(self, path: str = "guild_config.db"):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._configs = {row[0]: _from_row(*row) for row in self.db.execute("SELECT guild_id, data, updated_at FROM guild_config")}
+        self.listeners = []
+
+    def __len__(self):
+        return len(self._configs)
+
+    def __contains__(self, guild_id):
+        return guild_id in self._configs
+
+    def get(self, guild_id: int) -> Optional[GuildConfig]:
+        return self._configs.get(guild_id)
+
+    def all(self):
+        return list(self._configs.values())
+
+    def update(self, guild_id: int, **changes) -> GuildConfig:
+        """Creates or updates a guild's config. Pass None to clear a setting."""
+        unknown = set(changes) - FIELDS
+        if unknown: raise ValueError(f"unknown guild settings: {', '.join(sorted(unknown))}")
+        for key in TUPLE_FIELDS:
+            if changes.get(key) is not None: changes[key] = tuple(changes[key])
+        for key in SET_FIELDS:
+            if changes.get(key) is not None: changes[key] = frozenset(changes[key])
+        old = self._configs.get(guild_id)
+        new = dataclasses.replace(old or GuildConfig(guild_id), **changes, updated_at=time.time())
+        with self.db:
+            self.db.execute("INSERT INTO guild_config (guild_id, data, updated_at) VALUES (?, ?, ?) "
+                            "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                            (guild_id, new.to_json(), new.updated_at))
+        self._configs[guild_id] = new
+        for listener in self.listeners: listener(old, new)
+        return new
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,119 @@
+"""Background dispatcher for whitelist decision logs.
+
+Handlers hand their log embeds to `LogDispatcher.submit` and return right away;
+a single worker task groups bursts into multi-embed messages, fans them out to
+the target channels concurrently and retries rate-limited or transient failures.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import aiohttp
+import discord
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+@dataclass
+class LogEntry:
+    channel_ids: Sequence[int]
+    embed: discord.Embed
+    thumbnail_user_id: Optional[int] = None
+
+
+def chunk_embeds(embeds):
+    """Splits embeds into message-sized groups (10 embeds / 6000 characters each)."""
+    chunk, size = [], 0
+    for embed in embeds:
+        if chunk and (len(chunk) == MAX_EMBEDS_PER_MESSAGE or size + len(embed) > MAX_EMBED_CHARS_PER_MESSAGE):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(embed)
+        size += len(embed)
+    if chunk: yield chunk
+
+
+class LogDispatcher:
+    def __init__(self, bot, resolve_avatar=None, batch_window: float = 1.0,
+                 max_retries: int = 5, base_backoff: float = 1.0):
+        self.bot = bot
+        self.resolve_avatar = resolve_avatar
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, channel_ids: Sequence[int], embed: discord.Embed, thumbnail_user_id: int = None):
+        """Queues `embed` for every channel in `channel_ids`. Never blocks."""
+        self.queue.put_nowait(LogEntry(channel_ids, embed, thumbnail_user_id))
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0: break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._dispatch(batch)
+            except Exception as e:
+                print(f"Log Dispatch Error: {e}")
+            finally:
+                for _ in batch: self.queue.task_done()
+
+    async def _add_thumbnail(self, entry: LogEntry):
+        if not (entry.thumbnail_user_id and self.resolve_avatar): return
+        try:
+            url = await self.resolve_avatar(entry.thumbnail_user_id)
+        except Exception:
+            url = None
+        if url: entry.embed.set_thumbnail(url=url)
+
+    async def _dispatch(self, batch):
+        await asyncio.gather(*(self._add_thumbnail(entry) for entry in batch))
+        by_channel = {}
+        for entry in batch:
+            for cid in entry.channel_ids: by_channel.setdefault(cid, []).append(entry.embed)
+        await asyncio.gather(*(self._send_channel(cid, embeds) for cid, embeds in by_channel.items()))
+
+    async def _send_channel(self, channel_id: int, embeds):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except discord.HTTPException as e:
+                return print(f"Log Dispatch Error: channel {channel_id} unavailable ({e})")
+        for chunk in chunk_embeds(embeds):
+            await self._send_with_retry(channel, chunk)
+
+    async def _send_with_retry(self, channel, embeds):
+        for attempt in range(self.max_retries):
+            delay = self.base_backoff * 2 ** attempt
+            try:
+                await channel.send(embeds=embeds)
+                return
+            except discord.RateLimited as e:
+                delay = max(delay, e.retry_after)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    delay = max(delay, float(e.response.headers.get("Retry-After", delay)))
+                elif e.status < 500:
+                    return print(f"Log Dispatch Error: send to {channel.id} rejected ({e})")
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                pass
+            await asyncio.sleep(delay)
+        print(f"Log Dispatch Error: gave up sending {len(embeds)} log(s) to {channel.id}")
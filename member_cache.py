@@ -0,0 +1,99 @@
+"""Small on-demand member/user cache for running without discord.py's full member cache.
+
+In lean mode the gateway cache holds no members, so lookups fall through to a
+bounded LRU of recently fetched members and users, each kept for `ttl` seconds.
+Concurrent lookups for the same ID share a single REST request.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+_MISSING = object()
+
+
+class MemberCache:
+    def __init__(self, bot, ttl: float = 600.0, max_size: int = 1000, negative_ttl: float = 60.0):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl  # how long "not a member" answers are kept
+        self._entries = OrderedDict()     # (guild id or None, user id) -> (expires_at, member/user or None)
+        self._inflight = {}
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None: return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size: self._entries.popitem(last=False)
+
+    async def _lookup(self, key, fetch):
+        value = self._get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        value = await asyncio.shield(task)
+        if value is _MISSING: return None  # transient failure: don't remember it
+        self._put(key, value)
+        return value
+
+    def put(self, member):
+        """Seeds the cache with a member or user the bot already has (e.g. from an interaction payload)."""
+        guild = getattr(member, "guild", None)
+        if guild is not None: self._put((guild.id, member.id), member)
+        self._put((None, member.id), member)
+
+    def invalidate(self, user_id: int, guild_id: int = None):
+        self._entries.pop((guild_id, user_id), None)
+        self._entries.pop((None, user_id), None)
+
+    async def get_member(self, guild: discord.Guild, user_id: int):
+        """The guild member, or None if they are not in the guild (or Discord can't be reached)."""
+        member = guild.get_member(user_id)
+        if member is not None: return member
+
+        async def fetch():
+            try: return await guild.fetch_member(user_id)
+            except discord.NotFound: return None
+            except discord.HTTPException as e:
+                print(f"Member Cache Error ({user_id}): {e}")
+                return _MISSING
+        member = await self._lookup((guild.id, user_id), fetch)
+        # A member carries the user's avatar too, so avatar lookups can skip fetch_user
+        if member is not None and self._get((None, user_id)) is _MISSING: self._put((None, user_id), member)
+        return member
+
+    async def get_user(self, user_id: int):
+        """Any user (member of a shared guild or not), or None if the lookup failed."""
+        user = self.bot.get_user(user_id)
+        if user is not None: return user
+
+        async def fetch():
+            try: return await self.bot.fetch_user(user_id)
+            except discord.NotFound: return None
+            except discord.HTTPException: return _MISSING
+        return await self._lookup((None, user_id), fetch)
+
+    async def avatar_url(self, user_id: int):
+        user = await self.get_user(user_id)
+        return user.display_avatar.url if user else None
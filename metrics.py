@@ -0,0 +1,184 @@
+"""Lightweight in-process metrics: counters, latency histograms and event-loop lag.
+
+Everything is kept in plain dicts keyed by (name, labels) and rendered on demand
+in the Prometheus text format, either over a tiny HTTP endpoint or into a
+textfile for node_exporter's textfile collector.
+"""
+import asyncio
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+
+from atomic_file import atomic_write
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = [*key, *extra]
+    if not pairs: return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (good enough for a dashboard)."""
+        if not self.count: return 0.0
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target: return bound
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters = {}    # name -> {label key: value}
+        self.gauges = {}      # name -> {label key: value}
+        self.histograms = {}  # name -> {label key: Histogram}
+        self.help = {}
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        hist = series.get(key)
+        if hist is None: hist = series[key] = Histogram()
+        hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes the duration of the block; exceptions are counted in `<name minus _seconds>_errors_total`."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{name.removesuffix('_seconds')}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def track(self, name: str, **labels):
+        """Decorator form of `timer` for coroutine functions."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # --- Export ---
+
+    def render_prometheus(self) -> str:
+        lines = []
+
+        def header(name, kind):
+            if name in self.help: lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        self.set("process_uptime_seconds", time.time() - self.started_at)
+        for name, series in sorted(self.counters.items()):
+            header(name, "counter")
+            for key, value in series.items(): lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self.gauges.items()):
+            header(name, "gauge")
+            for key, value in series.items(): lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self.histograms.items()):
+            header(name, "histogram")
+            for key, hist in series.items():
+                cumulative = 0
+                for bound, n in zip((*hist.buckets, "+Inf"), hist.counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str, text: str = None):
+        """Atomically writes the metrics to `path`. Pass a pre-rendered `text` to do the I/O off the loop."""
+        atomic_write(path, text if text is not None else self.render_prometheus())
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9108):
+        """Serves the metrics at http://host:port/metrics. Returns the asyncio server."""
+        async def handle(reader, writer):
+            try:
+                request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+                path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b"/"
+                if path.split(b"?")[0] in (b"/", b"/metrics"):
+                    body, status = self.render_prometheus().encode(), b"200 OK"
+                else:
+                    body, status = b"not found\n", b"404 Not Found"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                await writer.drain()
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+        return await asyncio.start_server(handle, host, port)
+
+
+class LoopLagSampler:
+    """Background task measuring how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, metrics: Metrics, interval: float = 0.5):
+        self.metrics = metrics
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.metrics.observe("event_loop_lag_seconds", lag)
+            self.metrics.set("event_loop_lag_last_seconds", lag)
+
+
+metrics = Metrics()
+metrics.describe("rcon_command_seconds", "RCON command latency by server and command type")
+metrics.describe("rcon_commands_total", "RCON commands by server, command type and result")
+metrics.describe("discord_rest_seconds", "Discord REST request latency by route")
+metrics.describe("interaction_handler_seconds", "Interaction handler latency by handler")
+metrics.describe("event_loop_lag_seconds", "How late the event loop woke up from a short sleep")
+metrics.describe("startup_phase_seconds", "Duration of each one-time startup phase")
+metrics.describe("submissions_total", "Whitelist submissions by admission result")
+metrics.describe("submission_queue_depth", "Applications held back by admission control")
@@ -0,0 +1,177 @@
+"""Durable queue for RCON actions that failed because the server was unreachable.
+
+Queued actions live in SQLite so they survive bot restarts. A background worker
+waits until they are due, sends them as one batch spread over the server's
+connection pool and hands each reply to the handler registered for its kind.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from rcon_pool import RconError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_actions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    command TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pending_due ON pending_actions (next_attempt_at, id);
+"""
+
+
+@dataclass
+class PendingAction:
+    id: int
+    kind: str
+    command: str
+    payload: dict
+    attempts: int
+    next_attempt_at: float
+    created_at: float
+
+
+class PendingQueue:
+    def __init__(self, path: str = "pending_actions.db"):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM pending_actions").fetchone()[0]
+
+    def enqueue(self, kind: str, command: str, payload: dict = None) -> int:
+        now = time.time()
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO pending_actions (kind, command, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, command, json.dumps(payload or {}), now, now))
+        return cur.lastrowid
+
+    def due(self, limit: int = 50, serves=None):
+        """Due actions, oldest first. `serves(guild_id)`, if given, keeps only actions whose payload guild it accepts."""
+        if serves is None:
+            rows = self.db.execute("SELECT * FROM pending_actions WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                                   (time.time(), limit)).fetchall()
+        else:
+            # Filtered in SQL so other processes' actions can't crowd this one's out of the LIMIT
+            self.db.create_function("serves", 1, serves)
+            rows = self.db.execute("SELECT * FROM pending_actions WHERE next_attempt_at <= ?"
+                                   " AND serves(json_extract(payload, '$.guild_id')) ORDER BY id LIMIT ?",
+                                   (time.time(), limit)).fetchall()
+        return [PendingAction(**{**dict(row), "payload": json.loads(row["payload"])}) for row in rows]
+
+    def complete(self, action_id: int):
+        with self.db:
+            self.db.execute("DELETE FROM pending_actions WHERE id = ?", (action_id,))
+
+    def retry_later(self, action: PendingAction, delay: float):
+        with self.db:
+            self.db.execute("UPDATE pending_actions SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                            (time.time() + delay, action.id))
+
+    def close(self):
+        self.db.close()
+
+
+class PendingActionWorker:
+    """Drains a PendingQueue once the server answers again.
+
+    `handlers` maps an action kind to `async def handler(action, reply)`, which
+    finishes the Discord side (embed edits, roles, logs) after the command ran.
+    `pool_for(guild_id)` returns the RconGroup for the guild in an action's
+    payload ("guild_id", None for old actions) or None if it has no servers; the
+    action runs on the server named in its payload ("server"), or on the primary.
+    When several processes share the queue, `serves(guild_id)` tells which
+    actions belong to this one; the others are left alone for their owner.
+    `dropped` maps a kind to `async def handler(action, reason)`, called instead
+    when the action can't run anywhere any more (its server was removed).
+    """
+
+    def __init__(self, queue: PendingQueue, pool_for, handlers: dict, serves=None, dropped: dict = None, poll_interval: float = 5.0,
+                 batch_size: int = 50, base_backoff: float = 5.0, max_backoff: float = 300.0):
+        self.queue = queue
+        self.pool_for = pool_for
+        self.serves = serves
+        self.handlers = handlers
+        self.dropped = dropped or {}
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, kind: str, command: str, payload: dict = None) -> int:
+        action_id = self.queue.enqueue(kind, command, payload)
+        self._wake.set()
+        return action_id
+
+    def _backoff(self, action: PendingAction) -> float:
+        return min(self.max_backoff, self.base_backoff * 2 ** action.attempts)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"Pending Actions Error: {e}")
+
+    async def drain(self):
+        while True:
+            actions = self.queue.due(self.batch_size, self.serves)
+            if not actions: return
+            by_server = {}
+            for action in actions:
+                by_server.setdefault((action.payload.get("guild_id"), action.payload.get("server")), []).append(action)
+            results = await asyncio.gather(*(self._drain_server(guild_id, server, batch)
+                                             for (guild_id, server), batch in by_server.items()))
+            if not all(results): return
+
+    async def _drain_server(self, guild_id, server, actions) -> bool:
+        """Sends one server's batch. Returns False if anything has to be retried later."""
+        pool = self.pool_for(guild_id)
+        if pool is None or (server is not None and server not in pool.names):
+            # The guild's servers were reconfigured since this was queued: nowhere to run it
+            reason = f"server {server!r} is no longer configured" if pool is not None else "no servers are configured"
+            for action in actions:
+                print(f"Pending Actions Error ({action.kind} #{action.id}): {reason}, dropped")
+                self.queue.complete(action.id)
+                await self._call(self.dropped.get(action.kind), action, reason)
+            return True
+        try:
+            replies = await pool.batch([a.command for a in actions], server=server)
+        except RconError:
+            # Still unreachable: push the whole batch back
+            for action in actions: self.queue.retry_later(action, self._backoff(action))
+            return False
+        for action, reply in zip(actions, replies):
+            if isinstance(reply, RconError):
+                self.queue.retry_later(action, self._backoff(action))
+                continue
+            self.queue.complete(action.id)
+            await self._call(self.handlers.get(action.kind), action, reply)
+        return not any(isinstance(r, RconError) for r in replies)
+
+    async def _call(self, handler, action: PendingAction, arg):
+        if handler is None: return
+        try:
+            await handler(action, arg)
+        except Exception as e:
+            print(f"Pending Actions Error ({action.kind} #{action.id}): {e}")
@@ -0,0 +1,366 @@
+"""Asyncio-native Minecraft RCON client.
+
+Keeps a small pool of authenticated connections open and runs commands over
+them without ever blocking the event loop. Minecraft's RCON handler reads one
+packet per socket read and drops the connection if two arrive together, so
+each connection carries one command at a time; concurrency comes from the
+number of connections in the pool.
+"""
+import asyncio
+import struct
+import time
+
+# Packet types (Source RCON protocol, as implemented by Minecraft)
+SERVERDATA_RESPONSE_VALUE = 0
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_AUTH = 3
+
+MAX_REQUEST_ID = 2**31 - 1
+
+
+class RconError(Exception):
+    """Base class for RCON failures."""
+
+
+class RconConnectionError(RconError):
+    """The server is unreachable, refused the password or dropped the connection."""
+
+
+class RconTimeout(RconError):
+    """The server did not answer within the command timeout."""
+
+
+def _pack(request_id: int, packet_type: int, payload: str) -> bytes:
+    body = struct.pack("<ii", request_id, packet_type) + payload.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(body)) + body
+
+
+class RconConnection:
+    """A single authenticated RCON socket running one command at a time.
+
+    Minecraft splits long replies over several packets without marking the last
+    one, so once the first packet of a reply arrives an empty RESPONSE_VALUE
+    packet is sent. The server answers it after the rest of the reply, which
+    tells us the command's reply is complete. The sentinel is never written
+    together with the command: the server would read both at once and hang up.
+
+    If `resolve` is given, `await resolve(host, port)` picks the address actually
+    connected to on every connect (None refuses the host), so a name can't be
+    pointed somewhere else after it was checked.
+    """
+
+    def __init__(self, host: str, port: int, password: str, connect_timeout: float = 5.0, resolve=None):
+        self.host, self.port, self.password = host, port, password
+        self.connect_timeout = connect_timeout
+        self.resolve = resolve
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._next_id = 0
+        self._request = None  # [command id, sentinel id or None until sent, future, [payload chunks]]
+        self._closed = False
+        self.busy = False     # checked out by an RconPool
+
+    @property
+    def alive(self) -> bool:
+        return self._writer is not None and not self._closed
+
+
+    def _new_id(self) -> int:
+        self._next_id = self._next_id % MAX_REQUEST_ID + 1
+        return self._next_id
+
+    async def connect(self):
+        try:
+            address = self.host
+            if self.resolve is not None:
+                address = await asyncio.wait_for(self.resolve(self.host, self.port), self.connect_timeout)
+                if address is None: raise RconConnectionError(f"{self.host}:{self.port} is not an allowed address")
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(address, self.port), self.connect_timeout)
+            auth_id = self._new_id()
+            self._writer.write(_pack(auth_id, SERVERDATA_AUTH, self.password))
+            await self._writer.drain()
+            while True:
+                req_id, packet_type, _ = await asyncio.wait_for(self._read_packet(), self.connect_timeout)
+                if req_id == -1:
+                    raise RconConnectionError("RCON authentication failed")
+                # Some servers send an empty RESPONSE_VALUE before the auth reply
+                if req_id == auth_id and packet_type != SERVERDATA_RESPONSE_VALUE:
+                    break
+        except RconError:
+            self.close()
+            raise
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            self.close()
+            raise RconConnectionError(f"Could not connect to {self.host}:{self.port}: {e!r}") from e
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _read_packet(self):
+        (length,) = struct.unpack("<i", await self._reader.readexactly(4))
+        data = await self._reader.readexactly(length)
+        req_id, packet_type = struct.unpack("<ii", data[:8])
+        return req_id, packet_type, data[8:-2]
+
+    async def _read_loop(self):
+        try:
+            while True:
+                req_id, _, payload = await self._read_packet()
+                request = self._request
+                if request is None: continue  # late reply to a command that was given up on
+                cmd_id, sentinel_id, fut, chunks = request
+                if req_id == cmd_id:
+                    chunks.append(payload)
+                    if sentinel_id is None:
+                        request[1] = self._new_id()
+                        self._writer.write(_pack(request[1], SERVERDATA_RESPONSE_VALUE, ""))
+                elif req_id == sentinel_id and not fut.done():
+                    fut.set_result(b"".join(chunks).decode("utf-8", "replace"))
+        except (OSError, asyncio.IncompleteReadError, struct.error) as e:
+            self._fail(RconConnectionError(f"Connection to {self.host}:{self.port} lost: {e!r}"))
+        except asyncio.CancelledError:
+            self._fail(RconConnectionError("Connection closed"))
+            raise
+
+    def _fail(self, exc: Exception):
+        self._closed = True
+        if self._request and not self._request[2].done(): self._request[2].set_exception(exc)
+        self._request = None
+        if self._writer: self._writer.close()
+
+    async def command(self, command: str, timeout: float) -> str:
+        if not self.alive:
+            raise RconConnectionError("Connection is closed")
+        if self._request is not None:
+            raise RconError("Connection already has a command in flight")
+        cmd_id = self._new_id()
+        fut = asyncio.get_running_loop().create_future()
+        self._request = [cmd_id, None, fut, []]
+        try:
+            self._writer.write(_pack(cmd_id, SERVERDATA_EXECCOMMAND, command))
+            await self._writer.drain()
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            # The server may still answer (or still be reading); a fresh socket is the only safe next step
+            self._fail(RconTimeout(f"RCON command timed out after {timeout}s: {command}"))
+            raise RconTimeout(f"RCON command timed out after {timeout}s: {command}") from None
+        except OSError as e:
+            self._fail(RconConnectionError(repr(e)))
+            raise RconConnectionError(f"Connection to {self.host}:{self.port} lost: {e!r}") from e
+        finally:
+            if self._request is not None and self._request[2] is fut: self._request = None
+
+    def close(self):
+        if self._read_task: self._read_task.cancel()
+        self._fail(RconConnectionError("Connection closed"))
+
+
+class RconPool:
+    """A small pool of persistent RCON connections to one server.
+
+    Connections are opened lazily, reused across commands and replaced when they
+    drop. Each command checks out a connection of its own, so at most `size`
+    commands run at once and the rest wait for a free connection. After a
+    failed connect, new attempts are held back with exponential backoff so a
+    dead server fails fast instead of stalling every caller.
+    """
+
+    def __init__(self, host: str, port: int, password: str, size: int = 2,
+                 timeout: float = 5.0, max_backoff: float = 60.0, resolve=None):
+        self.host, self.port, self.password = host, port, password
+        self.resolve = resolve
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._conns = []
+        self._slots = asyncio.Semaphore(self.size)
+        self._connect_lock = asyncio.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self._failures == 0
+
+    async def _open(self) -> RconConnection:
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise RconConnectionError(f"{self.host}:{self.port} unreachable, retrying in {self._retry_at - now:.1f}s")
+        conn = RconConnection(self.host, self.port, self.password, connect_timeout=self.timeout, resolve=self.resolve)
+        try:
+            await conn.connect()
+        except RconConnectionError:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(self.max_backoff, 0.5 * 2 ** self._failures)
+            raise
+        self._failures, self._retry_at = 0, 0.0
+        self._conns.append(conn)
+        return conn
+
+    def _idle(self):
+        self._conns = [c for c in self._conns if c.alive]
+        return next((c for c in self._conns if not c.busy), None)
+
+    async def _checkout(self) -> RconConnection:
+        await self._slots.acquire()
+        try:
+            conn = self._idle()
+            if conn is None:
+                async with self._connect_lock:
+                    conn = self._idle() or await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+        conn.busy = True
+        return conn
+
+    def _checkin(self, conn: RconConnection):
+        conn.busy = False
+        self._slots.release()
+
+    async def command(self, command: str, timeout: float = None) -> str:
+        """Runs one command and returns the server's reply.
+
+        Raises RconConnectionError if the server is unreachable and RconTimeout
+        if it does not answer within `timeout` seconds.
+        """
+        timeout = timeout or self.timeout
+        for attempt in range(2):
+            conn = await self._checkout()
+            try:
+                return await conn.command(command, timeout)
+            except RconConnectionError:
+                # An idle socket may have gone stale (e.g. server restart); retry once on a fresh one
+                if attempt: raise
+            finally:
+                self._checkin(conn)
+
+    async def batch(self, commands, timeout: float = None):
+        """Runs several commands spread over the pool's connections.
+
+        Returns the replies in order; a command that failed on its own gets its
+        RconError in place of a reply. Raises RconConnectionError if no
+        connection can be opened at all.
+        """
+        replies = await asyncio.gather(*(self.command(c, timeout) for c in commands), return_exceptions=True)
+        if replies and all(isinstance(r, RconConnectionError) for r in replies): raise replies[0]
+        return replies
+
+    async def close(self):
+        for conn in self._conns: conn.close()
+        self._conns = []
+
+
+class ServerHealth:
+    """Rolling health of one server in an RconGroup."""
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.last_latency = None
+        self.last_error = None
+        self.last_ok_at = None
+
+    @property
+    def ok(self) -> bool:
+        return self.consecutive_failures == 0
+
+    def record(self, latency: float, error: Exception = None):
+        if error is None:
+            self.consecutive_failures, self.last_error = 0, None
+            self.last_latency, self.last_ok_at = latency, time.time()
+        else:
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+
+
+class RconGroup:
+    """Runs commands against several servers (e.g. the backends behind a proxy) concurrently.
+
+    Every server has its own RconPool, timeout and health record, so the total
+    latency of a fan-out is that of the slowest server rather than the sum.
+    The first server is the primary one, used for single-server queries.
+    Callables in `observers` are called as `observer(server, command, seconds, error)`
+    after every command, e.g. to record metrics.
+    """
+
+    def __init__(self, pools: dict):
+        if not pools: raise ValueError("RconGroup needs at least one server")
+        self.pools = dict(pools)
+        self.health = {name: ServerHealth() for name in self.pools}
+        self.observers = []
+
+    @classmethod
+    def from_config(cls, servers, size: int = 2, timeout: float = 5.0, resolve=None):
+        """Builds a group from [{"name", "host", "port", "password"[, "timeout"][, "trusted"]}, ...].
+
+        `resolve` (see RconConnection) applies to every server not marked "trusted".
+        """
+        return cls({s["name"]: RconPool(s["host"], int(s.get("port", 25575)), s["password"], size=size,
+                                        timeout=float(s.get("timeout", timeout)),
+                                        resolve=None if s.get("trusted") else resolve)
+                    for s in servers})
+
+    def resized(self, size: int) -> "RconGroup":
+        """A separate group with `size` connections per server to the same servers, e.g. for one bulk job.
+
+        It shares the observers but not the connections; close it when done.
+        """
+        group = RconGroup({name: RconPool(p.host, p.port, p.password, size=size, timeout=p.timeout,
+                                          max_backoff=p.max_backoff, resolve=p.resolve)
+                           for name, p in self.pools.items()})
+        group.observers = list(self.observers)
+        return group
+
+    @property
+    def names(self):
+        return list(self.pools)
+
+    @property
+    def primary(self) -> str:
+        return next(iter(self.pools))
+
+    def pool(self, name: str = None) -> RconPool:
+        return self.pools[name or self.primary]
+
+    async def _run_one(self, name: str, command: str, timeout: float = None):
+        start = time.monotonic()
+        try:
+            reply = await self.pools[name].command(command, timeout)
+        except RconError as e:
+            self._record(name, command, time.monotonic() - start, e)
+            return e
+        self._record(name, command, time.monotonic() - start)
+        return reply
+
+    def _record(self, name: str, command: str, seconds: float, error: Exception = None):
+        self.health[name].record(seconds, error)
+        for observer in self.observers: observer(name, command, seconds, error)
+
+    async def command(self, command: str, timeout: float = None, server: str = None) -> str:
+        """Runs a command on one server (the primary by default). Raises RconError on failure."""
+        reply = await self._run_one(server or self.primary, command, timeout)
+        if isinstance(reply, RconError): raise reply
+        return reply
+
+    async def broadcast(self, command: str, timeout: float = None, servers=None) -> dict:
+        """Runs a command on every server (or `servers`) at once.
+
+        Returns {server name: reply or RconError}.
+        """
+        names = list(servers or self.pools)
+        replies = await asyncio.gather(*(self._run_one(name, command, timeout) for name in names))
+        return dict(zip(names, replies))
+
+    async def batch(self, commands, timeout: float = None, server: str = None):
+        name = server or self.primary
+        start = time.monotonic()
+        try:
+            replies = await self.pool(name).batch(commands, timeout)
+        except RconError as e:
+            self._record(name, "batch", time.monotonic() - start, e)
+            raise
+        self._record(name, "batch", time.monotonic() - start)
+        return replies
+
+    async def close(self):
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
@@ -0,0 +1,176 @@
+"""Reconciles the MC whitelisted Discord role with the server whitelist.
+
+The job walks role holders and approved applications in small chunks, applies
+the minimal set of role/whitelist changes for each chunk and checkpoints its
+cursor to disk, so an interrupted run picks up where it stopped.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, asdict
+
+import discord
+
+from atomic_file import atomic_write
+
+WHITELIST_LIST_RE = re.compile(r"whitelisted player\(?s?\)?:\s*(.*)$", re.IGNORECASE | re.DOTALL)
+WHITELIST_EMPTY_RE = re.compile(r"^\s*there are no whitelisted players", re.IGNORECASE)
+
+PHASE_MEMBERS, PHASE_APPLICATIONS, PHASE_DONE = "members", "applications", "done"
+
+
+def parse_whitelist_list(resp: str):
+    """Parses `whitelist list` ("There are 2 whitelisted player(s): a, b") into a set of lowercase names.
+
+    Returns None for any other reply (e.g. "Unknown or incomplete command" from a
+    proxy backend): treating it as an empty whitelist would strip every role.
+    """
+    if WHITELIST_EMPTY_RE.match(resp): return set()
+    match = WHITELIST_LIST_RE.search(resp)
+    if not match: return None
+    return {name.strip().lower() for name in match.group(1).split(",") if name.strip()}
+
+
+async def fetch_all_members(guild: discord.Guild) -> dict:
+    """Pages through the guild's member list over REST (1000 per request) for a single run."""
+    return {member.id: member async for member in guild.fetch_members(limit=None)}
+
+
+@dataclass
+class ReconcileStats:
+    scanned: int = 0
+    roles_added: int = 0
+    roles_removed: int = 0
+    whitelist_removed: int = 0
+    unmapped: int = 0
+    errors: int = 0
+
+
+class ReconcileJob:
+    """One (resumable) reconciliation run for a guild.
+
+    - Role holders whose approved Minecraft name is no longer whitelisted lose the role.
+      Holders without a stored application are counted as unmapped and left alone.
+    - Approved applicants still in the guild and still whitelisted get the role back.
+    - With `prune_departed`, approved applicants who left the guild are removed from the whitelist.
+
+    Members come from the guild's member cache, or from `members` (see `fetch_all_members`)
+    when the bot runs without one.
+    """
+
+    def __init__(self, guild: discord.Guild, role: discord.Role, store, whitelisted: set, rcon_command,
+                 state_path: str = "reconcile_state.json", chunk_size: int = 100, action_delay: float = 0.5,
+                 prune_departed: bool = False, progress=None, members: dict = None):
+        self.guild, self.role, self.store = guild, role, store
+        self.members = members  # {user id: Member} when the gateway member cache is disabled
+        self.whitelisted = whitelisted
+        self.rcon_command = rcon_command
+        self.state_path = state_path
+        self.chunk_size = chunk_size
+        self.action_delay = action_delay
+        self.prune_departed = prune_departed
+        self.progress = progress
+        self.phase, self.cursor, self.stats = PHASE_MEMBERS, 0, ReconcileStats()
+        self.resumed = self._load_state()
+
+    # --- Checkpointing ---
+
+    def _load_state(self) -> bool:
+        try:
+            with open(self.state_path, "r") as f: state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("guild_id") != self.guild.id: return False
+        self.phase, self.cursor = state["phase"], state["cursor"]
+        self.stats = ReconcileStats(**state["stats"])
+        self.prune_departed = state.get("prune_departed", self.prune_departed)
+        return True
+
+    def _save_state(self):
+        state = {"guild_id": self.guild.id, "phase": self.phase, "cursor": self.cursor,
+                 "stats": asdict(self.stats), "prune_departed": self.prune_departed, "saved_at": time.time()}
+        atomic_write(self.state_path, json.dumps(state))
+
+    @staticmethod
+    def discard_state(state_path: str = "reconcile_state.json"):
+        try: os.remove(state_path)
+        except FileNotFoundError: pass
+
+    # --- Run ---
+
+    def _member(self, user_id: int):
+        return self.members.get(user_id) if self.members is not None else self.guild.get_member(user_id)
+
+    def _role_holders(self):
+        if self.members is None: return self.role.members
+        return [m for m in self.members.values() if self.role in m.roles]
+
+    async def run(self) -> ReconcileStats:
+        if self.phase == PHASE_MEMBERS:
+            await self._reconcile_members()
+            self.phase, self.cursor = PHASE_APPLICATIONS, 0
+            self._save_state()
+        if self.phase == PHASE_APPLICATIONS:
+            await self._reconcile_applications()
+        self.phase = PHASE_DONE
+        self.discard_state(self.state_path)
+        if self.progress: await self.progress(self)
+        return self.stats
+
+    async def _act(self, coro) -> bool:
+        try:
+            await coro
+            return True
+        except (discord.HTTPException, asyncio.TimeoutError) as e:
+            print(f"Reconcile Error: {e}")
+            self.stats.errors += 1
+            return False
+        finally:
+            await asyncio.sleep(self.action_delay)
+
+    async def _finish_chunk(self, cursor: int):
+        self.cursor = cursor
+        self._save_state()
+        if self.progress: await self.progress(self)
+
+    async def _reconcile_members(self):
+        # Only IDs are sorted here; members are resolved chunk by chunk
+        holder_ids = sorted(m.id for m in self._role_holders() if m.id > self.cursor)
+        for i in range(0, len(holder_ids), self.chunk_size):
+            chunk = holder_ids[i:i + self.chunk_size]
+            for user_id in chunk:
+                self.stats.scanned += 1
+                app = self.store.latest_approved(user_id, guild_id=self.guild.id)
+                if not app:
+                    self.stats.unmapped += 1
+                    continue
+                if (app.final_username or app.mc_username).lower() in self.whitelisted: continue
+                member = self._member(user_id)
+                if member and self.role in member.roles:
+                    if await self._act(member.remove_roles(self.role, reason="Reconcile: no longer whitelisted")):
+                        self.stats.roles_removed += 1
+            await self._finish_chunk(chunk[-1])
+
+    async def _reconcile_applications(self):
+        while True:
+            apps = self.store.iter_approved(after_id=self.cursor, limit=self.chunk_size, guild_id=self.guild.id)
+            if not apps: break
+            for app in apps:
+                self.stats.scanned += 1
+                name = app.final_username or app.mc_username
+                if name.lower() not in self.whitelisted: continue
+                member = self._member(app.user_id)
+                if member is not None:
+                    if self.role not in member.roles:
+                        if await self._act(member.add_roles(self.role, reason="Reconcile: whitelisted")):
+                            self.stats.roles_added += 1
+                elif self.prune_departed:
+                    if await self.rcon_command(f"whitelist remove {name}") is None:
+                        self.stats.errors += 1
+                    else:
+                        self.whitelisted.discard(name.lower())
+                        self.stats.whitelist_removed += 1
+                    await asyncio.sleep(self.action_delay)
+            await self._finish_chunk(apps[-1].id)
@@ -0,0 +1,178 @@
+"""Player session tracking from the live status poll.
+
+Each poll's player list is diffed against the previous one to find joins and
+leaves. Everything is kept in fixed-size typed arrays (persisted as raw
+numeric files), so memory stays bounded no matter how long the bot runs:
+
+- a ring buffer of per-minute online counts covering the last `days` days,
+- a ring buffer of the last `max_sessions` finished sessions (start, end, player),
+- per-player running totals (playtime, last seen) indexed by a small name table.
+
+Peak today, playtime and last seen are answered in constant time from these.
+"""
+import json
+import os
+import time
+from array import array
+
+from atomic_file import atomic_write
+
+MINUTES_PER_DAY = 1440
+
+
+class SessionTracker:
+    def __init__(self, directory: str = "sessions", days: int = 7, max_sessions: int = 10000):
+        self.directory = directory
+        self.slots = days * MINUTES_PER_DAY
+        self.max_sessions = max_sessions
+        # Per-minute online counts: counts[m % slots] is valid only if stamps[m % slots] == m
+        self.counts = array("H", bytes(2 * self.slots))
+        self.stamps = array("I", bytes(4 * self.slots))
+        # Finished sessions ring buffer
+        self.sess_start = array("I", bytes(4 * max_sessions))
+        self.sess_end = array("I", bytes(4 * max_sessions))
+        self.sess_player = array("I", bytes(4 * max_sessions))
+        self.sess_cursor = 0
+        self.sess_total = 0
+        # Per-player totals, indexed by position in `names`
+        self.names = []        # display names
+        self.index = {}        # lowercase name -> player index
+        self.playtime = array("d")
+        self.last_seen = array("I")
+        self.active = {}       # player index -> session start (epoch seconds)
+        self.peak_day = -1
+        self.peak = 0
+        self.peak_at = 0
+        self.last_poll_at = 0
+        self.load()
+
+    # --- Recording ---
+
+    def _player(self, name: str) -> int:
+        key = name.lower()
+        idx = self.index.get(key)
+        if idx is None:
+            idx = self.index[key] = len(self.names)
+            self.names.append(name)
+            self.playtime.append(0.0)
+            self.last_seen.append(0)
+        return idx
+
+    def _close(self, idx: int, now: int):
+        start = self.active.pop(idx)
+        self.playtime[idx] += max(0, now - start)
+        self.last_seen[idx] = now
+        slot = self.sess_cursor
+        self.sess_start[slot], self.sess_end[slot], self.sess_player[slot] = start, now, idx
+        self.sess_cursor = (slot + 1) % self.max_sessions
+        self.sess_total += 1
+
+    def observe(self, players, now: float = None):
+        """Records one poll (pass an empty list when the server is offline).
+
+        Returns (joined, left) as lists of player names.
+        """
+        now = int(now or time.time())
+        current = {self._player(name) for name in players}
+        joined = [self.names[i] for i in current if i not in self.active]
+        left = [self.names[i] for i in list(self.active) if i not in current]
+        for idx in list(self.active):
+            if idx not in current: self._close(idx, now)
+        for idx in current:
+            self.active.setdefault(idx, now)
+            self.last_seen[idx] = now
+
+        online = min(len(current), 0xFFFF)
+        minute = now // 60
+        slot = minute % self.slots
+        if self.stamps[slot] != minute:
+            self.stamps[slot], self.counts[slot] = minute, online
+        else:
+            self.counts[slot] = max(self.counts[slot], online)
+        day = now // 86400
+        if day != self.peak_day or online > self.peak:
+            self.peak_day, self.peak, self.peak_at = day, online, now
+        self.last_poll_at = now
+        return joined, left
+
+    # --- Queries (constant time) ---
+
+    def peak_today(self, now: float = None):
+        """Returns (peak, epoch seconds it was reached) for the current UTC day."""
+        if int(now or time.time()) // 86400 != self.peak_day: return 0, None
+        return self.peak, self.peak_at
+
+    def playtime_of(self, name: str, now: float = None):
+        """Total recorded playtime in seconds (including the running session), or None if never seen."""
+        idx = self.index.get(name.lower())
+        if idx is None: return None
+        total = self.playtime[idx]
+        if idx in self.active: total += int(now or time.time()) - self.active[idx]
+        return total
+
+    def last_seen_of(self, name: str):
+        """Returns (display name, last seen epoch seconds, online now), or None if never seen."""
+        idx = self.index.get(name.lower())
+        if idx is None: return None
+        return self.names[idx], self.last_seen[idx], idx in self.active
+
+    def online_count_at(self, when: float):
+        minute = int(when) // 60
+        slot = minute % self.slots
+        return self.counts[slot] if self.stamps[slot] == minute else None
+
+    def recent_sessions(self, limit: int = 10):
+        """The most recent finished sessions as (name, start, end), newest first."""
+        out = []
+        for i in range(min(limit, self.sess_total, self.max_sessions)):
+            slot = (self.sess_cursor - 1 - i) % self.max_sessions
+            out.append((self.names[self.sess_player[slot]], self.sess_start[slot], self.sess_end[slot]))
+        return out
+
+    # --- Persistence ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _arrays(self):
+        return {"counts.bin": self.counts, "stamps.bin": self.stamps, "sess_start.bin": self.sess_start,
+                "sess_end.bin": self.sess_end, "sess_player.bin": self.sess_player,
+                "playtime.bin": self.playtime, "last_seen.bin": self.last_seen}
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for filename, arr in self._arrays().items(): atomic_write(self._path(filename), arr.tobytes())
+        meta = {"slots": self.slots, "max_sessions": self.max_sessions, "names": self.names,
+                "sess_cursor": self.sess_cursor, "sess_total": self.sess_total,
+                "active": {str(k): v for k, v in self.active.items()},
+                "peak_day": self.peak_day, "peak": self.peak, "peak_at": self.peak_at,
+                "last_poll_at": self.last_poll_at}
+        atomic_write(self._path("meta.json"), json.dumps(meta))
+
+    def load(self):
+        try:
+            with open(self._path("meta.json"), "r") as f: meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("slots") != self.slots or meta.get("max_sessions") != self.max_sessions:
+            print("Session Tracker: ring buffer size changed, starting fresh")
+            return
+        names = meta["names"]
+        loaded = {}
+        try:
+            for filename, arr in self._arrays().items():
+                size = len(names) if filename in ("playtime.bin", "last_seen.bin") else len(arr)
+                loaded[filename] = array(arr.typecode)
+                with open(self._path(filename), "rb") as f: loaded[filename].fromfile(f, size)
+        except (OSError, EOFError) as e:
+            print(f"Session Tracker Error: {e}, starting fresh")
+            return
+        for filename, arr in self._arrays().items(): arr[:] = loaded[filename]
+        self.names = names
+        self.index = {name.lower(): i for i, name in enumerate(names)}
+        self.sess_cursor, self.sess_total = meta["sess_cursor"], meta["sess_total"]
+        self.peak_day, self.peak, self.peak_at = meta["peak_day"], meta["peak"], meta["peak_at"]
+        self.last_poll_at = meta["last_poll_at"]
+        # We can't know what happened while the bot was down: end open sessions at the last poll
+        self.active = {int(k): v for k, v in meta["active"].items()}
+        for idx in list(self.active): self._close(idx, self.last_poll_at)
@@ -0,0 +1,71 @@
+"""Startup helpers: timed setup phases and command sync that only runs when the tree changed.
+
+`bot.tree.sync()` is slow and heavily rate limited, so the payload it would
+upload is hashed and compared with the hash of the last successful sync,
+cached on disk next to the other data files.
+"""
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+
+from atomic_file import atomic_write
+
+
+def command_tree_hash(tree, guild=None) -> str:
+    """SHA-256 of the JSON Discord would receive for the tree's (global or guild) commands."""
+    payload = sorted((cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+                     key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _load_hashes(path: str) -> dict:
+    try:
+        with open(path, "r") as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hashes(path: str, hashes: dict):
+    atomic_write(path, json.dumps(hashes))
+
+
+async def sync_if_changed(tree, path: str, application_id: int, force: bool = False) -> bool:
+    """Syncs the global commands unless they match the last sync for this application. Returns True if it synced."""
+    key = str(application_id)
+    digest = command_tree_hash(tree)
+    hashes = _load_hashes(path)
+    if not force and hashes.get(key) == digest: return False
+    await tree.sync()
+    hashes[key] = digest
+    _save_hashes(path, hashes)
+    return True
+
+
+class StartupTimer:
+    """Times named startup phases into `startup_phase_seconds{phase}` and keeps them for a summary line."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.milestones = {}
+
+    def mark(self, name: str):
+        """Records seconds since launch the first time `name` happens. Returns them, or None on repeats."""
+        if name in self.milestones: return None
+        seconds = self.milestones[name] = time.perf_counter() - self.started
+        self.metrics.set("startup_milestone_seconds", seconds, milestone=name)
+        return seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            with self.metrics.timer("startup_phase_seconds", phase=name):
+                yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
@@ -0,0 +1,146 @@
+"""Parsing, change detection and adaptive poll scheduling for the live status embed."""
+import asyncio
+import heapq
+import itertools
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+LIST_RE = re.compile(r'(\d+)\s*of\s*(?:a\s*max\s*(?:of\s*)?)?(\d+)')
+
+
+@dataclass(frozen=True)
+class ServerStatus:
+    is_online: bool
+    online: int = 0
+    max_players: int = 0
+    players: Tuple[str, ...] = ()
+    servers: Tuple[Tuple[str, bool, int, int], ...] = ()  # (name, is_online, online, max) per backend
+
+
+OFFLINE = ServerStatus(is_online=False)
+
+
+def parse_list(resp: Optional[str]) -> ServerStatus:
+    """Turns a `list` reply ("There are 5 of a max of 20 players online: a, b") into a ServerStatus."""
+    if resp is None: return OFFLINE
+    online = max_players = 0
+    match = LIST_RE.search(resp)
+    if match: online, max_players = map(int, match.groups())
+    players = ()
+    if ":" in resp:
+        p_part = resp.split(":", 1)[1].strip()
+        if p_part: players = tuple(sorted((p.strip() for p in p_part.split(",") if p.strip()), key=str.lower))
+    return ServerStatus(True, online, max_players, players)
+
+
+def merge_statuses(statuses: dict) -> ServerStatus:
+    """Aggregates {server name: ServerStatus} for a proxy network into one status."""
+    up = [st for st in statuses.values() if st.is_online]
+    if not up: return ServerStatus(False, servers=tuple((name, False, 0, 0) for name in statuses))
+    players = sorted({p for st in up for p in st.players}, key=str.lower)
+    return ServerStatus(True, sum(st.online for st in up), sum(st.max_players for st in up), tuple(players),
+                        tuple((name, st.is_online, st.online, st.max_players) for name, st in statuses.items()))
+
+
+class AdaptivePoller:
+    """Picks the next poll interval from how recently the status changed.
+
+    Polls fast for a few cycles after players join or leave, settles to the
+    normal rate while players are online, and slows down when the server is
+    empty or offline.
+    """
+
+    def __init__(self, fast: float = 10, normal: float = 30, slow: float = 60, settle_polls: int = 3):
+        self.fast, self.normal, self.slow = fast, normal, slow
+        self.settle_polls = settle_polls
+        self._last_hash = None
+        self._unchanged = 0
+
+    def observe(self, status: ServerStatus) -> bool:
+        """Records a poll result. Returns True if it differs from the previous one."""
+        digest = hash(status)
+        changed = digest != self._last_hash
+        self._last_hash = digest
+        self._unchanged = 0 if changed else self._unchanged + 1
+        return changed
+
+    def next_interval(self, status: ServerStatus) -> float:
+        if not status.is_online: return self.slow
+        if self._unchanged < self.settle_polls: return self.fast
+        return self.normal if status.players or status.online else self.slow
+
+    def reset(self):
+        """Forces the next observed status to count as a change."""
+        self._last_hash = None
+        self._unchanged = 0
+
+
+class StatusScheduler:
+    """Drives many independent polling loops (one per key, e.g. per guild) from a single task.
+
+    `poll` is `async def poll(key) -> float`, returning the seconds until that
+    key's next poll. Due keys sit in a heap, so an idle scheduler costs one
+    sleeping task no matter how many keys it holds, and at most `concurrency`
+    polls run at once.
+    """
+
+    def __init__(self, poll, concurrency: int = 8, error_interval: float = 30.0):
+        self.poll = poll
+        self.error_interval = error_interval
+        self._sem = asyncio.Semaphore(concurrency)
+        self._heap = []
+        self._due = {}  # key -> due time, or None while its poll is running
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def schedule(self, key, delay: float = 0.0):
+        """(Re)schedules `key` to poll after `delay` seconds, replacing any earlier schedule."""
+        due = asyncio.get_running_loop().time() + delay
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+        self._wake.set()
+
+    def remove(self, key):
+        self._due.pop(key, None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            # Entries replaced by a later schedule() or remove() are dropped lazily
+            while self._heap and self._due.get(self._heap[0][2], -1) != self._heap[0][0]: heapq.heappop(self._heap)
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            due, _, key = self._heap[0]
+            if due > loop.time():
+                try: await asyncio.wait_for(self._wake.wait(), due - loop.time())
+                except asyncio.TimeoutError: pass
+                continue
+            heapq.heappop(self._heap)
+            self._due[key] = None
+            await self._sem.acquire()
+            asyncio.create_task(self._poll_one(key))
+
+    async def _poll_one(self, key):
+        delay = self.error_interval
+        try:
+            delay = await self.poll(key)
+        except Exception as e:
+            print(f"Status Scheduler Error ({key}): {e}")
+        finally:
+            self._sem.release()
+        # Only reschedule if nobody removed or rescheduled the key meanwhile
+        if key in self._due and self._due[key] is None: self.schedule(key, delay)
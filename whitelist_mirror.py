@@ -0,0 +1,96 @@
+"""In-memory mirror of the Minecraft server's whitelist.json.
+
+Lets the bot answer "is this player whitelisted?" from memory, without an
+RCON round trip and even while the server is down. The file is only re-read
+when its mtime or size changes, and the index is patched with the difference
+instead of being rebuilt.
+"""
+import json
+import os
+from typing import Optional
+
+
+def _norm_name(name: str) -> str:
+    return name.strip().lower()
+
+
+def _norm_uuid(uuid: str) -> str:
+    return uuid.replace("-", "").lower()
+
+
+class WhitelistMirror:
+    def __init__(self, path: str):
+        self.path = path
+        self._signature = None  # (mtime_ns, size) of the last file we indexed
+        self._by_name = {}      # normalized name -> {"name": ..., "uuid": ...}
+        self._by_uuid = {}      # normalized uuid -> same entry
+
+    @property
+    def loaded(self) -> bool:
+        return self._signature is not None
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return _norm_name(name) in self._by_name
+
+    def lookup_name(self, name: str) -> Optional[dict]:
+        return self._by_name.get(_norm_name(name))
+
+    def lookup_uuid(self, uuid: str) -> Optional[dict]:
+        return self._by_uuid.get(_norm_uuid(uuid))
+
+    def names(self):
+        return [entry["name"] for entry in self._by_name.values()]
+
+    def read(self):
+        """Stats and, if it changed, parses the file. Safe to run in a worker thread.
+
+        Returns (signature, entries), or None when the file is unchanged or unreadable.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature: return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: entries = json.load(f)
+        except (OSError, ValueError) as e:
+            # The server may be mid-write; try again on the next refresh
+            print(f"Whitelist Mirror Error ({self.path}): {e}")
+            return None
+        return signature, [e for e in entries if isinstance(e, dict) and e.get("name")]
+
+    def apply(self, signature, entries):
+        """Patches the index to match `entries`. Returns the number of names added and removed."""
+        fresh = {_norm_name(e["name"]): {"name": e["name"], "uuid": e.get("uuid", "")} for e in entries}
+        removed = [key for key in self._by_name if key not in fresh]
+        for key in removed:
+            entry = self._by_name.pop(key)
+            self._by_uuid.pop(_norm_uuid(entry["uuid"]), None)
+        changed = len(removed)
+        for key, entry in fresh.items():
+            if self._by_name.get(key) != entry:
+                old = self._by_name.get(key)
+                if old: self._by_uuid.pop(_norm_uuid(old["uuid"]), None)
+                self._by_name[key] = entry
+                if entry["uuid"]: self._by_uuid[_norm_uuid(entry["uuid"])] = entry
+                changed += 1
+        self._signature = signature
+        return changed
+
+    def refresh(self) -> int:
+        result = self.read()
+        return self.apply(*result) if result else 0
+
+    def add_local(self, name: str, uuid: str = ""):
+        """Records a player we just whitelisted over RCON, before the server rewrites the file."""
+        entry = {"name": name.strip(), "uuid": uuid}
+        self._by_name[_norm_name(name)] = entry
+        if uuid: self._by_uuid[_norm_uuid(uuid)] = entry
+
+    def remove_local(self, name: str):
+        entry = self._by_name.pop(_norm_name(name), None)
+        if entry and entry["uuid"]: self._by_uuid.pop(_norm_uuid(entry["uuid"]), None)